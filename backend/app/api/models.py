@@ -4,16 +4,16 @@ Pydantic models for API requests and responses
 
 from pydantic import BaseModel, Field, validator
 from typing import Optional
-from datetime import datetime
-from enum import Enum
+from datetime import datetime, timezone
+from enum import StrEnum
 
 
 # ============================================================================
 # Enums
 # ============================================================================
 
-class JobStatus(str, Enum):
-    """Job status enumeration"""
+class JobStatus(StrEnum):
+    """Job status enumeration (StrEnum: compares, formats and serializes as its value)"""
     PENDING = "pending"
     APPROVED = "approved"
     RUNNING = "running"
@@ -154,6 +154,7 @@ class JobHistoryResponse(BaseModel):
     page: int = Field(..., description="Current page number")
     limit: int = Field(..., description="Items per page")
     total_pages: int = Field(..., description="Total number of pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, None on the last page")
     
     class Config:
         use_enum_values = True
@@ -183,7 +184,7 @@ class ErrorResponse(BaseModel):
     """
     detail: str = Field(..., description="Error message")
     error_code: Optional[str] = Field(None, description="Error code")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Error timestamp")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Error timestamp")
 
 
 class MessageResponse(BaseModel):
@@ -201,7 +202,7 @@ class LogEvent(BaseModel):
     """
     Model for a single log event in SSE stream
     """
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Log timestamp")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Log timestamp")
     message: str = Field(..., description="Log message")
     level: Optional[str] = Field(default="INFO", description="Log level")
     
@@ -19,7 +19,12 @@ from app.api.models import (
     JobHistoryQuery,
     JobApprovalRequest
 )
-from app.repositories.job_repository import JobRepository, get_job_repository
+from app.repositories.job_repository import (
+    AsyncJobRepository,
+    get_async_job_repository,
+    JobNotFoundError,
+    JobStatusError
+)
 from app.utils.helpers import (
     generate_job_id,
     get_scraper_type,
@@ -66,7 +71,7 @@ async def list_scrapers():
 @router.post("/request", response_model=JobCreateResponse, status_code=201)
 async def request_scrape(
     request: ScraperRequestCreate,
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Request a new scraper job (creates job in pending status)
@@ -99,7 +104,7 @@ async def request_scrape(
             created_by=request.created_by
         )
         
-        job = repo.create_job(job_data)
+        job = await repo.create_job(job_data)
         
         logger.info(f"✅ Scraper job requested: {job_id} ({request.scraper_name})")
         
@@ -120,7 +125,7 @@ async def request_scrape(
 
 @router.get("/pending", response_model=list[JobResponse])
 async def get_pending_jobs(
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Get all pending jobs awaiting approval
@@ -133,7 +138,7 @@ async def get_pending_jobs(
     """
     try:
         logger.info(f"🔍 Fetching pending jobs with status: {JobStatus.PENDING}")
-        jobs = repo.get_pending_jobs()
+        jobs = await repo.get_pending_jobs()
         
         logger.info(f"📋 Retrieved {len(jobs)} pending jobs")
         
@@ -153,7 +158,7 @@ async def approve_job(
     job_id: str,
     background_tasks: BackgroundTasks,
     approval_request: Optional[JobApprovalRequest] = None,
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Approve a pending job and start execution
@@ -168,20 +173,9 @@ async def approve_job(
         JobActionResponse: Approval result
     """
     try:
-        # Get the job
-        job = repo.get_job_by_id(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
-        
-        # Verify job is in pending status
-        if job['status'] != JobStatus.PENDING:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Job is not in pending status. Current status: {job['status']}"
-            )
-        
-        # Approve the job
-        approved_job = repo.approve_job(job_id)
+        # Approve the job - the UPDATE itself checks it is still pending, so of two
+        # concurrent approvals only one gets through
+        approved_job = await repo.approve_job(job_id)
         
         # Start execution in background with Docker
         from app.services.scraper_service import get_scraper_service
@@ -201,6 +195,10 @@ async def approve_job(
             message=f"Job approved and execution started"
         )
         
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobStatusError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -211,7 +209,7 @@ async def approve_job(
 @router.post("/dismiss/{job_id}", response_model=JobActionResponse)
 async def dismiss_job(
     job_id: str,
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Dismiss/cancel a job
@@ -224,21 +222,14 @@ async def dismiss_job(
         JobActionResponse: Dismissal result
     """
     try:
-        # Get the job
-        job = repo.get_job_by_id(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
-        
-        current_status = job['status']
+        # Cancel in the database (only pending or running jobs, checked by the UPDATE)
+        job = await repo.cancel_job(job_id, reason="Dismissed by user")
         
-        # If job is running, stop the container
-        if current_status == JobStatus.RUNNING:
+        # Only a job that was running has a container - stop it
+        if job.get('container_id'):
             from app.services.scraper_service import get_scraper_service
             scraper_service = get_scraper_service()
-            scraper_service.cancel_job(job_id)
-        else:
-            # Just update status in database
-            repo.cancel_job(job_id, reason="Dismissed by user")
+            await scraper_service.stop_job_container(job_id, job['container_id'])
         
         logger.info(f"🚫 Job dismissed: {job_id}")
         
@@ -248,6 +239,10 @@ async def dismiss_job(
             message=f"Job dismissed successfully"
         )
         
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobStatusError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -262,7 +257,7 @@ async def dismiss_job(
 @router.get("/job/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: str,
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Get details of a specific job
@@ -275,7 +270,7 @@ async def get_job(
         JobResponse: Job details
     """
     try:
-        job = repo.get_job_by_id(job_id)
+        job = await repo.get_job_by_id(job_id)
         
         if not job:
             raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
@@ -295,7 +290,8 @@ async def get_job_history(
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     scraper_name: Optional[str] = Query(None, description="Filter by scraper name"),
     status: Optional[JobStatus] = Query(None, description="Filter by status"),
-    repo: JobRepository = Depends(get_job_repository)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (overrides page)"),
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Get job history with pagination and filtering
@@ -305,6 +301,7 @@ async def get_job_history(
         limit: Items per page
         scraper_name: Filter by scraper name (optional)
         status: Filter by status (optional)
+        cursor: Keyset cursor from the previous page (optional)
         repo: Job repository dependency
     
     Returns:
@@ -312,11 +309,12 @@ async def get_job_history(
     """
     try:
         # Get jobs and total count
-        jobs, total = repo.get_job_history(
+        jobs, total, next_cursor = await repo.get_job_history(
             page=page,
             limit=limit,
             scraper_name=scraper_name,
-            status=status
+            status=status,
+            cursor=cursor
         )
         
         # Calculate total pages
@@ -329,9 +327,12 @@ async def get_job_history(
             total=total,
             page=page,
             limit=limit,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get job history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -339,7 +340,7 @@ async def get_job_history(
 
 @router.get("/running", response_model=list[JobResponse])
 async def get_running_jobs(
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Get all currently running jobs
@@ -351,7 +352,7 @@ async def get_running_jobs(
         list[JobResponse]: List of running jobs
     """
     try:
-        jobs = repo.get_running_jobs()
+        jobs = await repo.get_running_jobs()
         
         logger.info(f"🔄 Retrieved {len(jobs)} running jobs")
         
@@ -368,7 +369,7 @@ async def get_running_jobs(
 
 @router.get("/statistics")
 async def get_statistics(
-    repo: JobRepository = Depends(get_job_repository)
+    repo: AsyncJobRepository = Depends(get_async_job_repository)
 ):
     """
     Get job statistics (counts by status)
@@ -380,7 +381,7 @@ async def get_statistics(
         dict: Statistics with counts for each status
     """
     try:
-        stats = repo.get_job_statistics()
+        stats = await repo.get_job_statistics()
         
         logger.info(f"📊 Retrieved job statistics")
         
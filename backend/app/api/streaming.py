@@ -8,7 +8,7 @@ import logging
 import asyncio
 from typing import AsyncGenerator
 
-from app.repositories.job_repository import JobRepository, get_job_repository
+from app.repositories.job_repository import AsyncJobRepository, get_async_job_repository
 from app.services.docker_service import get_docker_service, DockerService
 from app.api.models import JobStatus
 
@@ -41,13 +41,14 @@ async def log_stream_generator(
         yield f"data: {{\"status\": \"connected\", \"job_id\": \"{job_id}\", \"message\": \"Log stream started\"}}\n\n"
         
         # Get container
-        container = docker_service.get_container(container_id)
+        container = await docker_service.run_blocking(docker_service.get_container, container_id)
         if not container:
             yield f"data: {{\"status\": \"error\", \"job_id\": \"{job_id}\", \"message\": \"Container not found\"}}\n\n"
             return
         
         # Stream logs from container
-        log_stream = container.logs(
+        log_stream = await docker_service.run_blocking(
+            container.logs,
             stdout=True,
             stderr=True,
             stream=True,
@@ -55,8 +56,10 @@ async def log_stream_generator(
             timestamps=True
         )
         
-        # Stream each log line as SSE event
-        for log_line in log_stream:
+        # Stream each log line as SSE event - the iterator blocks until the container writes
+        # its next line, so it is read on a thread of its own (off both the Docker executor
+        # and the default one the job repository uses, so idle viewers can't starve either)
+        async for log_line in docker_service.stream_in_own_thread(log_stream):
             try:
                 # Decode log line
                 log_text = log_line.decode('utf-8').strip()
@@ -76,7 +79,7 @@ async def log_stream_generator(
                 continue
         
         # Container finished - send completion message
-        container.reload()
+        await docker_service.run_blocking(container.reload)
         exit_code = container.attrs.get('State', {}).get('ExitCode', -1)
         
         if exit_code == 0:
@@ -94,7 +97,7 @@ async def log_stream_generator(
 @router.get("/logs/{job_id}")
 async def stream_job_logs(
     job_id: str,
-    repo: JobRepository = Depends(get_job_repository),
+    repo: AsyncJobRepository = Depends(get_async_job_repository),
     docker_service: DockerService = Depends(get_docker_service)
 ):
     """
@@ -119,7 +122,7 @@ async def stream_job_logs(
     """
     try:
         # Get the job
-        job = repo.get_job_by_id(job_id)
+        job = await repo.get_job_by_id(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
         
@@ -132,7 +135,7 @@ async def stream_job_logs(
             )
         
         # Check if container exists
-        container = docker_service.get_container(container_id)
+        container = await docker_service.run_blocking(docker_service.get_container, container_id)
         if not container:
             raise HTTPException(
                 status_code=404,
@@ -163,7 +166,7 @@ async def stream_job_logs(
 async def get_job_logs_history(
     job_id: str,
     tail: int = 100,
-    repo: JobRepository = Depends(get_job_repository),
+    repo: AsyncJobRepository = Depends(get_async_job_repository),
     docker_service: DockerService = Depends(get_docker_service)
 ):
     """
@@ -180,7 +183,7 @@ async def get_job_logs_history(
     """
     try:
         # Get the job
-        job = repo.get_job_by_id(job_id)
+        job = await repo.get_job_by_id(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
         
@@ -193,7 +196,8 @@ async def get_job_logs_history(
             )
         
         # Get logs
-        logs = docker_service.get_container_logs(
+        logs = await docker_service.run_blocking(
+            docker_service.get_container_logs,
             container_id,
             stream=False,
             tail=tail
@@ -26,7 +26,9 @@ class Settings(BaseSettings):
     
     # Docker configuration
     DOCKER_HOST: Optional[str] = None  # Default: unix:///var/run/docker.sock
+    FORCE_TCP_DOCKER: bool = False  # Keep a tcp://localhost DOCKER_HOST instead of the local socket
     DOCKER_IMAGE_NAME: str = "cpt-scraper-image"
+    DOCKER_PREPULL_ON_START: bool = True  # Pull a missing scraper image in the background at startup, not at the first job
     
     # CORS settings
     CORS_ORIGINS: list[str] = ["*"]  # Configure for production
@@ -2,9 +2,13 @@
 Database connection and initialization
 """
 
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 from app.core.config import settings
 import logging
+import threading
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -12,12 +16,25 @@ logger = logging.getLogger(__name__)
 class Database:
     """
     Supabase database connection manager
+    
+    Every repository shares one Supabase client, and all of its PostgREST requests go
+    through one httpx connection pool, so keep-alive connections are reused instead of
+    paying a TCP/TLS handshake per request.
     """
     
+    # Connection pool for the shared httpx client
+    HTTP_MAX_CONNECTIONS = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+    # Same as supabase's default PostgREST timeout
+    HTTP_TIMEOUT = 120.0
+    
     def __init__(self):
-        self._client: Client | None = None
+        self._client: "Client | None" = None
+        self._http_client = None
+        # Repository calls run in worker threads, so first use can race
+        self._lock = threading.Lock()
     
-    def get_client(self) -> Client:
+    def get_client(self) -> "Client":
         """
         Get or create Supabase client instance
         
@@ -25,24 +42,53 @@ class Database:
             Client: Supabase client instance
         """
         if self._client is None:
-            try:
-                self._client = create_client(
-                    settings.SUPABASE_URL,
-                    settings.SUPABASE_KEY
-                )
-                logger.info("✅ Supabase client initialized successfully")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize Supabase client: {e}")
-                raise
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
         
         return self._client
     
+    def _create_client(self) -> "Client":
+        """
+        Create the Supabase client on top of a shared httpx connection pool
+        
+        Returns:
+            Client: Supabase client instance
+        """
+        # supabase (auth, storage, realtime, postgrest) is imported on first use, not
+        # with this module
+        import httpx
+        from supabase import create_client, ClientOptions
+        
+        try:
+            # Passed as httpx_client, the pool also survives supabase rebuilding its
+            # PostgREST client (it does on auth state changes)
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=self.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.HTTP_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=self.HTTP_TIMEOUT
+            )
+            client = create_client(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                options=ClientOptions(httpx_client=self._http_client)
+            )
+            logger.info("✅ Supabase client initialized successfully")
+            return client
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize Supabase client: {e}")
+            raise
+    
     def close(self):
         """
         Close database connection (if needed)
         """
-        # Supabase client doesn't require explicit closing
-        # but we can reset the instance
+        # Supabase client doesn't require explicit closing, but its connection pool does
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
         self._client = None
         logger.info("Database connection closed")
 
@@ -51,7 +97,7 @@ class Database:
 db = Database()
 
 
-def get_db() -> Client:
+def get_db() -> "Client":
     """
     Dependency function to get database client
     
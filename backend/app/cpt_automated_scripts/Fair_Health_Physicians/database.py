@@ -1,16 +1,12 @@
 import logging
-import sys
-from pathlib import Path
 from supabase import create_client, Client
 from typing import List, Dict
 import os
 from dotenv import load_dotenv
 
-# Add parent directory to path to import common utilities
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from database_utils import (
+from ..database_utils import (
     get_existing_release_date,
-    prepare_record_for_insertion,
+    prepare_records_for_insertion,
     upsert_records_with_composite_key
 )
 
@@ -72,16 +68,13 @@ class SupabaseHandlerPhysician:
             self.client, self.TABLE_NAME, self.SOURCE_NAME
         )
         
-        validated_records = []
-        for record in records:
-            prepared = prepare_record_for_insertion(
-                record=record,
-                source_name=self.SOURCE_NAME,
-                existing_release_date=existing_release_date,
-                has_geozip=True  # Fair Health Physicians has geozip
-            )
-            if prepared:
-                validated_records.append(prepared)
+        # Column-level validation in one pandas pass
+        validated_records = prepare_records_for_insertion(
+            records=records,
+            source_name=self.SOURCE_NAME,
+            existing_release_date=existing_release_date,
+            has_geozip=True  # Fair Health Physicians has geozip
+        )
         
         filtered_count = initial_count - len(validated_records)
         if filtered_count > 0:
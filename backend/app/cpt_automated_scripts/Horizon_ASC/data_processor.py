@@ -13,6 +13,14 @@ class DataProcessorHorizonASC:
     SOURCE_DESC_COL = "Short Descriptor"
     SOURCE_RATE_COL = "Horizon ASC FS"
 
+    # Arrow-backed dtypes keep the string-heavy columns (codes, descriptions,
+    # geozip, source) in Arrow C++ for .str ops and to_dict('records').
+    # Applied in clean_data, not at read time: the code column mixes numeric
+    # CPT codes with alphanumeric ones (0001T, G-codes), which Arrow type
+    # inference can't hold in one column
+    EXCEL_ENGINE = "calamine"
+    DTYPE_BACKEND = "pyarrow"
+
     def read_excel(self, file_path: Path) -> pd.DataFrame:
         """Read Excel file into DataFrame"""
         logger.info(f"Reading Excel file: {file_path}")
@@ -22,11 +30,15 @@ class DataProcessorHorizonASC:
 
         try:
             # Try to read with header detection
-            df = pd.read_excel(file_path, header=0)
+            df = pd.read_excel(
+                file_path, header=0, engine=self.EXCEL_ENGINE
+            )
             
             # If header row not found, search for it
             if self.SOURCE_HCPCS_COL not in df.columns:
-                df_temp = pd.read_excel(file_path, header=None)
+                df_temp = pd.read_excel(
+                    file_path, header=None, engine=self.EXCEL_ENGINE
+                )
                 header_row_idx = None
                 
                 for idx, row in df_temp.iterrows():
@@ -38,7 +50,9 @@ class DataProcessorHorizonASC:
                         break
                 
                 if header_row_idx is not None:
-                    df = pd.read_excel(file_path, header=header_row_idx)
+                    df = pd.read_excel(
+                        file_path, header=header_row_idx, engine=self.EXCEL_ENGINE
+                    )
             
             logger.info(f"Loaded {len(df)} rows (raw)")
             logger.info(f"Raw columns found: {list(df.columns)}")
@@ -91,12 +105,17 @@ class DataProcessorHorizonASC:
 
         # Create cleaned DataFrame with mapped columns
         df_cleaned = pd.DataFrame()
-        df_cleaned['code'] = df[columns_mapping['code']].astype(str).str.strip()
-        df_cleaned['code_description'] = df[columns_mapping['code_description']].astype(str).str.strip()
+        df_cleaned['code'] = df[columns_mapping['code']].astype('string[pyarrow]').str.strip()
+        df_cleaned['code_description'] = df[columns_mapping['code_description']].astype('string[pyarrow]').str.strip()
         
         # Clean rate column - remove currency symbols, commas
-        rate_series = df[columns_mapping['80th']].astype(str).str.replace('$', '').str.replace(',', '').str.strip()
-        df_cleaned['80th'] = pd.to_numeric(rate_series, errors='coerce')
+        rate_series = (
+            df[columns_mapping['80th']].astype('string[pyarrow]')
+            .str.replace('$', '', regex=False)
+            .str.replace(',', '', regex=False)
+            .str.strip()
+        )
+        df_cleaned['80th'] = pd.to_numeric(rate_series, errors='coerce').astype('double[pyarrow]')
 
         # Set data type
         df_cleaned['data_type'] = 'ASC Commercial'
@@ -114,11 +133,12 @@ class DataProcessorHorizonASC:
         df_cleaned['rel_date'] = f'January {current_year}'
 
         # Remove rows with null codes or rates
+        # Arrow strings keep missing cells as <NA>, so fill before comparing
         initial_count = len(df_cleaned)
+        codes = df_cleaned['code'].fillna('')
         df_cleaned = df_cleaned[
-            df_cleaned['code'].notna() & 
-            (df_cleaned['code'] != '') & 
-            (df_cleaned['code'] != 'nan') &
+            (codes != '') & 
+            (codes != 'nan') &
             df_cleaned['80th'].notna()
         ]
         
@@ -126,5 +146,13 @@ class DataProcessorHorizonASC:
         if removed_count > 0:
             logger.warning(f"Removed {removed_count} rows with null/empty codes or rates")
 
+        # Keep the constant columns Arrow-backed too; '80th' stays a float column
+        df_cleaned = df_cleaned.convert_dtypes(dtype_backend=self.DTYPE_BACKEND, convert_integer=False)
+
+        # <NA> is not JSON serializable - hand None to Supabase for any remaining gaps
+        for col in df_cleaned.columns:
+            if df_cleaned[col].isna().any():
+                df_cleaned[col] = df_cleaned[col].astype(object).where(df_cleaned[col].notna(), None)
+
         logger.info(f"✅ Cleaned data: {len(df_cleaned)} rows")
         return df_cleaned
@@ -1,4 +1,5 @@
 import logging
+import re
 from pathlib import Path
 from playwright.sync_api import sync_playwright, Page
 import time
@@ -6,12 +7,27 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Matches "ASC" in link text or href regardless of case
+_ASC_RE = re.compile(r'asc', re.IGNORECASE)
+
 class HorizonASCScraper:
     """Scraper for Horizon Blue Cross/Blue Shield ASC fee schedule"""
 
     BASE_URL = "https://www.horizonblue.com/providers/resources/fee-schedules"
     SOURCE_ID = "Horizon_ASC"
 
+    # Download link selectors, in priority order
+    _SELECTORS = (
+        'a[href*="ASC"]',
+        'a[href*="asc"]',
+        'a:has-text("ASC")',
+        'a:has-text("Ambulatory Surgical Center")',
+        'a[href*="fee-schedule"]',
+        'a[href*="Fee Schedule"]',
+        'a[href$=".xlsx"]',
+        'a[href$=".xls"]',
+    )
+
     def __init__(self, download_dir: Path = Path.cwd() / "downloads_horizon_asc"):
         self.download_dir = download_dir
         self.download_dir.mkdir(parents=True, exist_ok=True)
@@ -51,27 +67,16 @@ class HorizonASCScraper:
                 
                 # Try multiple selectors for the download link
                 download_link = None
-                selectors = [
-                    'a[href*="ASC"]',
-                    'a[href*="asc"]',
-                    'a:has-text("ASC")',
-                    'a:has-text("Ambulatory Surgical Center")',
-                    'a[href*="fee-schedule"]',
-                    'a[href*="Fee Schedule"]',
-                    'a[href$=".xlsx"]',
-                    'a[href$=".xls"]',
-                ]
-
-                for selector in selectors:
+                for selector in self._SELECTORS:
                     try:
                         links = page.locator(selector).all()
                         for link in links:
-                            link_text = link.inner_text().lower()
+                            link_text = link.inner_text()
                             href = link.get_attribute('href') or ''
-                            if 'asc' in link_text or 'asc' in href.lower():
+                            if _ASC_RE.search(link_text) or _ASC_RE.search(href):
                                 download_link = link
                                 logger.info(f"Found ASC link with selector: {selector}")
-                                logger.info(f"Link text: {link.inner_text()}")
+                                logger.info(f"Link text: {link_text}")
                                 logger.info(f"Link href: {href}")
                                 break
                         if download_link:
@@ -2,15 +2,11 @@ from supabase import create_client, Client
 from typing import List, Dict
 import logging
 import os
-import sys
-from pathlib import Path
 import dotenv
 
-# Add parent directory to path to import common utilities
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from database_utils import (
+from ..database_utils import (
     get_existing_release_date,
-    prepare_record_for_insertion,
+    prepare_records_for_insertion,
     upsert_records_with_composite_key
 )
 
@@ -78,16 +74,13 @@ class SupabaseHandlerCLFS:
             self.client, self.table_name, self.source_name
         )
         
-        validated_records = []
-        for record in records:
-            prepared = prepare_record_for_insertion(
-                record=record,
-                source_name=self.source_name,
-                existing_release_date=existing_release_date,
-                has_geozip=True  # CLFS data has geozip='USA' (updated for Milestone 4)
-            )
-            if prepared:
-                validated_records.append(prepared)
+        # Column-level validation in one pandas pass
+        validated_records = prepare_records_for_insertion(
+            records=records,
+            source_name=self.source_name,
+            existing_release_date=existing_release_date,
+            has_geozip=True  # CLFS data has geozip='USA' (updated for Milestone 4)
+        )
         
         filtered_count = initial_count - len(validated_records)
         if filtered_count > 0:
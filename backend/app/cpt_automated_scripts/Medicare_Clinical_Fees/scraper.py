@@ -1,8 +1,20 @@
 import asyncio
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import re
 import zipfile
 import shutil
+import time
+import uuid
+from html.parser import HTMLParser
 from pathlib import Path
-from playwright.async_api import async_playwright, Page, Browser
+from urllib.parse import urljoin, urlparse, unquote
+import aiofiles
+import aiohttp
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Download, Locator, Response, Route
 import logging
 
 # Configure logging
@@ -12,6 +24,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Use Intel ISA-L's SIMD Deflate for ZIP extraction when available; zipfile looks
+# up its decompressor through the module-level zlib reference
+try:
+    import isal
+    from isal import isal_zlib
+    zipfile.zlib = isal_zlib
+    logger.debug(f"Using isal {isal.__version__} for ZIP decompression")
+except ImportError:
+    isal_zlib = None
+
+# Link text/href keywords for the download link scan, compiled once
+# (matched against text/href already lowercased in the browser)
+_KEYWORD_RE = re.compile(r'download|zip|clfs|clinical|laboratory|fee|schedule|file|data')
+_PRIORITY_RE = re.compile(r'zip|download')
+_CLFS_RE = re.compile(r'clfs')
+
+
+class _MappedZip(mmap.mmap):
+    """Read-only mmap that zipfile accepts as a seekable file object"""
+
+    def seekable(self) -> bool:
+        # mmap only grew seekable() in Python 3.13; zipfile asks for it when opening members
+        return True
+
+
+class _CMSPageParser(HTMLParser):
+    """Collects links and forms from a CMS page for the direct HTTP download"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: list[tuple[str, str]] = []  # (text, href)
+        self.forms: list[dict] = []
+        self._link_href: str | None = None
+        self._link_text: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'a' and attrs.get('href'):
+            self._link_href = attrs['href']
+            self._link_text = []
+        elif tag == 'form':
+            self.forms.append({
+                'action': attrs.get('action') or '',
+                'method': (attrs.get('method') or 'get').lower(),
+                'inputs': [],
+            })
+        elif tag in ('input', 'button') and self.forms:
+            self.forms[-1]['inputs'].append(attrs)
+
+    def handle_data(self, data):
+        if self._link_href is not None:
+            self._link_text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._link_href is not None:
+            self.links.append((" ".join("".join(self._link_text).split()), self._link_href))
+            self._link_href = None
+
 
 class CLFSDownloader:
     """Handles downloading and extracting CLFS files from CMS website"""
@@ -25,13 +95,79 @@ class CLFSDownloader:
     # 5. Update FILE_URL with the correct path
     FILE_URL = "https://www.cms.gov/medicare/medicare-fee-service-payment/clinicallabfeesched/clinical-laboratory-fee-schedule-files/25clabq1"
     DOWNLOAD_DIR = Path("./downloads")
+    # Set CLFS_USE_BROWSER=1 to skip the direct HTTP download and drive Chromium instead
+    USE_BROWSER = os.environ.get("CLFS_USE_BROWSER", "").lower() in ("1", "true", "yes")
+    # Set CLFS_DEBUG=1 to save screenshots and dump page HTML when a step fails
+    DEBUG = os.environ.get("CLFS_DEBUG", "").lower() in ("1", "true", "yes")
+    CHUNK_SIZE = 1 << 20  # 1 MiB
+    # run-* staging directories older than this are removed when a downloader starts
+    STALE_STAGING_AGE = 24 * 3600
+    # Spreadsheet inside the CMS ZIP, e.g. CLAB2025Q1.xlsx (matched case-insensitively)
+    EXPECTED_MEMBER_GLOB = "CLAB*Q*.xlsx"
+    # Elements considered when looking for the download trigger
+    CLICKABLE_SELECTOR = 'a, button, [role="button"]'
+    # Download link selectors in priority order: the related-links list, direct
+    # file links, then any link inside a common CMS Drupal section
+    LINK_SELECTORS = (
+        '.field--name-field-related-links .field__items li a',
+        'a[href$=".zip"], a[href*=".zip"], a[href*="/download"], a[href*="/file"]',
+        '.field--name-field-related-links a',
+        '.field--name-field-downloads a',
+        '.field--name-field-files a',
+        '[class*="download"] a',
+        '[class*="file"] a',
+        '[class*="related"] a',
+        'section[class*="download"] a',
+        'div[class*="download"] a',
+    )
+    # Requests aborted by the browser to cut page-load bytes
+    BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+    BLOCKED_HOSTS = (
+        "google-analytics", "googletagmanager", "doubleclick", "hotjar",
+        "facebook", "newrelic", "nr-data", "siteimprove", "qualtrics",
+    )
+    # Accept control on the CMS license agreement page
+    ACCEPT_SELECTOR = 'input[type="submit"][value*="Accept" i], button:has-text("Accept")'
+    # Fallback pages tried when FILE_URL is dead
+    ALTERNATIVE_URLS = (
+        "https://www.cms.gov/medicare/medicare-fee-service-payment/clinicallabfeesched/clinical-laboratory-fee-schedule-files",
+        "https://www.cms.gov/medicare/payment/clinical-diagnostic-laboratory-fees/clinical-laboratory-fee-schedule-files",
+        "https://www.cms.gov/medicare/medicare-fee-service-payment/clinicallabfeesched",
+    )
     
-    def __init__(self):
+    def __init__(self, use_browser: bool | None = None):
         self.browser: Browser | None = None
+        self.context: BrowserContext | None = None
         self.page: Page | None = None
         self.playwright = None
+        self.session: aiohttp.ClientSession | None = None
+        self.use_browser = self.USE_BROWSER if use_browser is None else use_browser
         self.download_dir = self.DOWNLOAD_DIR
         self.download_dir.mkdir(exist_ok=True)
+        self._prune_stale_staging_dirs()
+        # Per-run scratch space for screenshots, the ZIP and the extracted XLSX
+        self.staging_dir = self.download_dir / f"run-{uuid.uuid4().hex}"
+        self.staging_dir.mkdir()
+        # Where the extracted XLSX is published for the pipeline to read
+        self.latest_xlsx_path = self.download_dir / "latest.xlsx"
+        # CMS cookies saved after accepting the license, reused on the next run
+        self.state_path = self.download_dir / "cms_state.json"
+        # Selector + href pattern that found the download link on the last run
+        self.selector_hint_path = self.download_dir / "selector_hint.json"
+        # ZIPs kept between runs, keyed by ETag, with index.json mapping
+        # FILE_URL -> {url, etag, last_modified, path}
+        self.cache_dir = self.download_dir / "cache"
+        self.cache_index_path = self.cache_dir / "index.json"
+    
+    async def initialize_session(self) -> None:
+        """Initialize the aiohttp session used for the direct HTTP download"""
+        logger.info("Initializing HTTP session...")
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=4),
+            timeout=aiohttp.ClientTimeout(total=300, sock_connect=30),
+            headers={'User-Agent': 'Mozilla/5.0 (compatible; CLFSDownloader)'}
+        )
+        logger.info("HTTP session initialized successfully")
         
     async def initialize_browser(self) -> None:
         """Initialize Playwright browser instance"""
@@ -41,307 +177,422 @@ class CLFSDownloader:
             headless=True,
             args=['--start-maximized']
         )
-        context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
+        storage_state = self.state_path if self.state_path.exists() else None
+        if storage_state:
+            logger.info(f"Reusing saved CMS session from {self.state_path}")
+        self.context = await self.browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            storage_state=storage_state
         )
-        self.page = await context.new_page()
+        # Only documents, scripts and XHR matter for finding the download link
+        await self.context.route("**/*", self._block_heavy_resources)
+        self.page = await self.context.new_page()
         logger.info("Browser initialized successfully")
+    
+    async def _block_heavy_resources(self, route: Route) -> None:
+        """Abort images, fonts, media, stylesheets and analytics requests"""
+        request = route.request
+        host = urlparse(request.url).hostname or ''
+        if request.resource_type in self.BLOCKED_RESOURCE_TYPES or any(h in host for h in self.BLOCKED_HOSTS):
+            await route.abort()
+        else:
+            await route.continue_()
         
+    async def _debug_screenshot(self, filename: str, full_page: bool = True) -> None:
+        """Save a screenshot into the staging directory when CLFS_DEBUG is set"""
+        if not self.DEBUG:
+            return
+        try:
+            screenshot_path = self.staging_dir / filename
+            await self.page.screenshot(path=screenshot_path, full_page=full_page)
+            logger.info(f"📸 Screenshot saved: {screenshot_path}")
+        except Exception:
+            pass
+        
+    async def _is_not_found(self, page: Page, response: Response | None) -> bool:
+        """
+        Decide whether a navigation landed on a 404 / Page Not Found
+        
+        Args:
+            page: Page that was navigated
+            response: Response returned by page.goto
+            
+        Returns:
+            bool: True if the page is missing
+        """
+        title_lower = (await page.title()).lower()
+        if response is None or response.status >= 400 or "404" in title_lower or "error" in title_lower:
+            return True
+        # CMS can serve a soft 404 with status 200; only the start of the body is needed
+        head = (await response.body())[:4096].decode('utf-8', errors='ignore').lower()
+        return "page not found" in head
+    
     async def navigate_to_file_page(self) -> None:
         """Navigate directly to the file detail page"""
         logger.info(f"Navigating to {self.FILE_URL}")
-        await self.page.goto(self.FILE_URL, wait_until="networkidle")
+        response = await self.page.goto(self.FILE_URL, wait_until="domcontentloaded")
         
         # Check if we got a 404 or Page Not Found error
-        page_title = await self.page.title()
-        page_content = await self.page.content()
-        
-        # Check for common error indicators
-        if "page not found" in page_content.lower() or "404" in page_content.lower() or "error" in page_title.lower():
-            logger.error("❌ Page Not Found (404) - The URL may have changed!")
-            logger.error(f"   Page title: {page_title}")
+        if await self._is_not_found(self.page, response):
+            status = response.status if response else "no response"
+            logger.error(f"❌ Page Not Found ({status}) - The URL may have changed!")
+            logger.error(f"   Page title: {await self.page.title()}")
             
             # Take screenshot for debugging
-            try:
-                error_screenshot = self.download_dir / "404_error_screenshot.png"
-                await self.page.screenshot(path=error_screenshot, full_page=True)
-                logger.error(f"📸 404 error screenshot saved: {error_screenshot}")
-            except:
-                pass
-            
-            # Try alternative URLs
-            alternative_urls = [
-                "https://www.cms.gov/medicare/medicare-fee-service-payment/clinicallabfeesched/clinical-laboratory-fee-schedule-files",
-                "https://www.cms.gov/medicare/payment/clinical-diagnostic-laboratory-fees/clinical-laboratory-fee-schedule-files",
-                "https://www.cms.gov/medicare/medicare-fee-service-payment/clinicallabfeesched",
-            ]
+            await self._debug_screenshot("404_error_screenshot.png")
             
+            # Probe the alternative URLs concurrently in pages of the shared context;
+            # the first live one becomes the working page without a second navigation
             logger.warning("⚠️ Trying alternative URLs...")
-            for alt_url in alternative_urls:
-                try:
-                    logger.info(f"   Trying: {alt_url}")
-                    await self.page.goto(alt_url, wait_until="networkidle", timeout=30000)
-                    await asyncio.sleep(2)
-                    
-                    # Check if this page is valid
-                    new_content = await self.page.content()
-                    if "page not found" not in new_content.lower() and "404" not in new_content.lower():
+            probe_pages = await asyncio.gather(*(self.context.new_page() for _ in self.ALTERNATIVE_URLS))
+            tasks = [
+                asyncio.create_task(self._probe(page, url))
+                for page, url in zip(probe_pages, self.ALTERNATIVE_URLS)
+            ]
+            winner = None
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    alt_url, page, ok = await next_done
+                    if ok:
                         logger.info(f"✅ Found valid page at: {alt_url}")
+                        winner = page
+                        await self.page.close()
+                        self.page = winner
                         self.FILE_URL = alt_url  # Update the URL for future reference
                         return
-                except Exception as e:
-                    logger.warning(f"   Failed: {e}")
-                    continue
+                    await page.close()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                for page in probe_pages:
+                    if page is not winner and not page.is_closed():
+                        await page.close()
             
             raise Exception(f"Page Not Found at {self.FILE_URL}. The CMS website structure may have changed. Please check the CMS website manually for the correct CLFS file URL.")
         
         logger.info("File page loaded successfully")
         
-    async def download_zip_file(self) -> Path:
+    async def _probe(self, page: Page, url: str) -> tuple[str, Page, bool]:
         """
-        Clicks link, accepts terms on the same page, and downloads the ZIP file.
+        Load a candidate CLFS page and check whether it is live
         
+        Args:
+            page: Fresh page from the shared browser context
+            url: Candidate URL
+            
         Returns:
-            Path: Path to downloaded ZIP file
+            tuple: (url, page, True if the page loaded without a 404)
         """
-        logger.info("Looking for download link...")
+        logger.info(f"   Trying: {url}")
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            return url, page, not await self._is_not_found(page, response)
+        except Exception as e:
+            logger.warning(f"   Failed: {url} ({e})")
+            return url, page, False
         
-        # Wait for page to fully load
-        await self.page.wait_for_load_state("networkidle")
-        await asyncio.sleep(2)  # Additional wait for dynamic content
+    async def _dump_links(self, selectors: list[str] | None = None) -> list[dict]:
+        """
+        Collect every clickable element on the current page in a single evaluate call
         
-        # Take screenshot for debugging
-        try:
-            screenshot_path = self.download_dir / "page_screenshot.png"
-            await self.page.screenshot(path=screenshot_path)
-            logger.info(f"📸 Screenshot saved: {screenshot_path}")
-        except:
-            pass
+        Args:
+            selectors: Selectors to test each element against (defaults to LINK_SELECTORS)
+        
+        Returns:
+            list: Dicts with the element's document-order index (matching
+                ``page.locator(CLICKABLE_SELECTOR).nth(index)``), tag, text, raw href,
+                lowercased text/href (done in the browser so Python never re-cases them),
+                visibility and the indices of the selectors it matches
+        """
+        return await self.page.evaluate(
+            """([clickable, selectors]) => [...document.querySelectorAll(clickable)].map((el, index) => ({
+                index,
+                tag: el.tagName.toLowerCase(),
+                text: el.innerText || '',
+                href: el.getAttribute('href'),
+                text_lower: (el.innerText || '').toLowerCase(),
+                href_lower: (el.getAttribute('href') || '').toLowerCase(),
+                visible: el.offsetParent !== null,
+                matches: selectors.flatMap((sel, i) => el.matches(sel) ? [i] : []),
+            }))""",
+            [self.CLICKABLE_SELECTOR, selectors or list(self.LINK_SELECTORS)]
+        )
+    
+    async def _find_download_link(
+        self, hint: dict | None = None
+    ) -> tuple[Locator | None, str | None, dict | None]:
+        """
+        Pick the download link from one DOM dump, trying each strategy in priority order
         
-        # Try multiple selectors to find download link
-        download_link = None
-        link_text = None
+        Args:
+            hint: Selector hint saved by the last successful run, tried first
         
-        # Strategy 1: Look for Related Links section
-        try:
-            logger.info("  ↳ Trying selector: .field--name-field-related-links")
-            await self.page.wait_for_selector(
-                '.field--name-field-related-links', 
-                timeout=15000,
-                state='visible'
+        Returns:
+            tuple: (locator of the chosen element, its text, selector hint to save),
+                or (None, None, None) if nothing matched
+        """
+        selectors = list(self.LINK_SELECTORS)
+        if hint:
+            selectors.append(hint['primary_selector'])
+        elements = await self._dump_links(selectors)
+        clickables = self.page.locator(self.CLICKABLE_SELECTOR)
+        links = [el for el in elements if el['tag'] == 'a']
+        logger.info(f"  ↳ Found {len(links)} links on page")
+        
+        def chosen(el: dict, text: str, selector: str) -> tuple[Locator, str, dict | None]:
+            new_hint = self._make_selector_hint(selector, el['href']) if el['href'] else None
+            return clickables.nth(el['index']), text, new_hint
+        
+        def first_match(selector_index: int, visible_only: bool = False) -> dict | None:
+            return next(
+                (el for el in elements
+                 if selector_index in el['matches'] and (el['visible'] or not visible_only)),
+                None
             )
-            download_link = self.page.locator(
-                '.field--name-field-related-links .field__items li a'
-            ).first
-            await download_link.wait_for(state='visible', timeout=5000)
-            link_text = await download_link.inner_text()
-            logger.info(f"✅ Found download link (method 1): {link_text}")
-        except Exception as e:
-            logger.warning(f"  ↳ Method 1 failed: {e}")
+        
+        # Strategy 0: Selector and href pattern that worked on the last run
+        if hint:
+            href_re = re.compile(hint['href_pattern'], re.IGNORECASE)
+            hit = next(
+                (el for el in elements
+                 if len(self.LINK_SELECTORS) in el['matches'] and el['href'] and href_re.search(el['href'])),
+                None
+            )
+            if hit:
+                logger.info(f"✅ Found download link (saved hint): {hit['text']} (href: {hit['href']})")
+                return chosen(hit, hit['text'], hint['primary_selector'])
+            logger.warning("  ↳ Saved selector hint did not match - trying all strategies")
+        
+        # Strategy 1: Look for Related Links section
+        hit = first_match(0, visible_only=True)
+        if hit:
+            logger.info(f"✅ Found download link (method 1): {hit['text']}")
+            return chosen(hit, hit['text'], self.LINK_SELECTORS[0])
+        logger.warning("  ↳ Method 1 failed: no visible related link")
         
         # Strategy 2: Look for any link containing "download" or "zip" or "CLFS"
-        if not download_link or not link_text:
-            try:
-                logger.info("  ↳ Trying alternative: links with 'download', 'zip', or 'CLFS'")
-                # Try to find links with download-related text
-                all_links = self.page.locator('a')
-                link_count = await all_links.count()
-                logger.info(f"  ↳ Found {link_count} links on page")
-                
-                # Log all links for debugging
-                logger.info("  ↳ Scanning all links on page...")
-                all_link_info = []
-                for i in range(min(link_count, 100)):  # Check first 100 links
-                    link = all_links.nth(i)
-                    try:
-                        text = await link.inner_text()
-                        href = await link.get_attribute('href')
-                        text_lower = (text or "").strip().lower()
-                        href_lower = (href or "").lower()
-                        
-                        # Log all links for debugging
-                        if text or href:
-                            all_link_info.append(f"Link {i}: text='{text[:50]}' href='{href[:100] if href else 'None'}'")
-                        
-                        # Look for download indicators - be more flexible
-                        keywords = ['download', 'zip', 'clfs', 'clinical', 'laboratory', 'fee', 'schedule', 'file', 'data']
-                        if any(keyword in text_lower or keyword in href_lower for keyword in keywords):
-                            # Prioritize links with zip or download
-                            if 'zip' in href_lower or 'download' in text_lower or 'download' in href_lower:
-                                download_link = link
-                                link_text = text or href or "Download link"
-                                logger.info(f"✅ Found download link (method 2): {link_text} (href: {href})")
-                                break
-                            # Also check for CLFS-related links
-                            elif 'clfs' in text_lower or 'clfs' in href_lower:
-                                download_link = link
-                                link_text = text or href or "CLFS link"
-                                logger.info(f"✅ Found CLFS link (method 2): {link_text} (href: {href})")
-                                break
-                    except Exception as link_error:
-                        continue
-                
-                # If we found links but none matched, log them
-                if not download_link and all_link_info:
-                    logger.warning(f"  ↳ All {len(all_link_info)} links found (showing first 10):")
-                    for link_info in all_link_info[:10]:
-                        logger.warning(f"     {link_info}")
-                        
-            except Exception as e:
-                logger.warning(f"  ↳ Method 2 failed: {e}")
+        all_link_info = []
+        for link in links[:100]:  # Check first 100 links
+            text, href = link['text'], link['href']
+            
+            # Log all links for debugging
+            if text or href:
+                all_link_info.append(f"Link {link['index']}: text='{text[:50]}' href='{href[:100] if href else 'None'}'")
+            
+            # Look for download indicators - be more flexible
+            haystack = f"{link['text_lower']}\n{link['href_lower']}"
+            if _KEYWORD_RE.search(haystack):
+                # Prioritize links with zip or download
+                if _PRIORITY_RE.search(haystack):
+                    logger.info(f"✅ Found download link (method 2): {text or href} (href: {href})")
+                    return chosen(link, text or href or "Download link", self.CLICKABLE_SELECTOR)
+                # Also check for CLFS-related links
+                elif _CLFS_RE.search(haystack):
+                    logger.info(f"✅ Found CLFS link (method 2): {text or href} (href: {href})")
+                    return chosen(link, text or href or "CLFS link", self.CLICKABLE_SELECTOR)
+        
+        # If we found links but none matched, log them
+        if all_link_info:
+            logger.warning(f"  ↳ All {len(all_link_info)} links found (showing first 10):")
+            for link_info in all_link_info[:10]:
+                logger.warning(f"     {link_info}")
         
         # Strategy 3: Look for direct download buttons or file links
-        if not download_link or not link_text:
-            try:
-                logger.info("  ↳ Trying alternative: direct file links")
-                # Look for links that end with .zip or contain .zip
-                zip_links = self.page.locator('a[href$=".zip"], a[href*=".zip"], a[href*="/download"], a[href*="/file"]')
-                count = await zip_links.count()
-                logger.info(f"  ↳ Found {count} potential file/download links")
-                if count > 0:
-                    download_link = zip_links.first
-                    link_text = await download_link.inner_text()
-                    href = await download_link.get_attribute('href')
-                    logger.info(f"✅ Found file link (method 3): {link_text} (href: {href})")
-            except Exception as e:
-                logger.warning(f"  ↳ Method 3 failed: {e}")
+        hit = first_match(1)
+        if hit:
+            logger.info(f"✅ Found file link (method 3): {hit['text']} (href: {hit['href']})")
+            return chosen(hit, hit['text'], self.LINK_SELECTORS[1])
         
         # Strategy 4: Look for buttons or any clickable element with download-related text
-        if not download_link or not link_text:
-            try:
-                logger.info("  ↳ Trying alternative: buttons and clickable elements")
-                # Look for buttons or divs with download text
-                download_elements = self.page.locator(
-                    'button:has-text("Download"), button:has-text("download"), '
-                    'a:has-text("Download"), a:has-text("download"), '
-                    '[role="button"]:has-text("Download"), [role="button"]:has-text("download")'
-                )
-                count = await download_elements.count()
-                logger.info(f"  ↳ Found {count} download buttons/elements")
-                if count > 0:
-                    download_link = download_elements.first
-                    link_text = await download_link.inner_text()
-                    logger.info(f"✅ Found download button (method 4): {link_text}")
-            except Exception as e:
-                logger.warning(f"  ↳ Method 4 failed: {e}")
+        hit = next((el for el in elements if 'download' in el['text_lower']), None)
+        if hit:
+            logger.info(f"✅ Found download button (method 4): {hit['text']}")
+            return chosen(hit, hit['text'], self.CLICKABLE_SELECTOR)
         
         # Strategy 5: Look for any link in common CMS sections
-        if not download_link or not link_text:
-            try:
-                logger.info("  ↳ Trying alternative: CMS-specific sections")
-                # Try common CMS Drupal sections
-                sections = [
-                    '.field--name-field-related-links',
-                    '.field--name-field-downloads',
-                    '.field--name-field-files',
-                    '[class*="download"]',
-                    '[class*="file"]',
-                    '[class*="related"]',
-                    'section[class*="download"]',
-                    'div[class*="download"]'
-                ]
-                
-                for selector in sections:
-                    try:
-                        section = self.page.locator(selector)
-                        count = await section.count()
-                        if count > 0:
-                            logger.info(f"  ↳ Found section with selector: {selector}")
-                            links_in_section = section.locator('a')
-                            link_count = await links_in_section.count()
-                            if link_count > 0:
-                                # Take the first link in this section
-                                download_link = links_in_section.first
-                                link_text = await download_link.inner_text()
-                                href = await download_link.get_attribute('href')
-                                logger.info(f"✅ Found link in section {selector} (method 5): {link_text} (href: {href})")
-                                break
-                    except:
-                        continue
-            except Exception as e:
-                logger.warning(f"  ↳ Method 5 failed: {e}")
+        for selector_index in range(2, len(self.LINK_SELECTORS)):
+            hit = first_match(selector_index)
+            if hit:
+                logger.info(f"✅ Found link in section {self.LINK_SELECTORS[selector_index]} (method 5): {hit['text']} (href: {hit['href']})")
+                return chosen(hit, hit['text'], self.LINK_SELECTORS[selector_index])
         
         # Strategy 6: Last resort - try any link that's visible and might be relevant
-        if not download_link or not link_text:
+        visible_links = [link for link in links if link['visible'] and link['href'] is not None]
+        logger.info(f"  ↳ Found {len(visible_links)} visible links")
+        for link in visible_links[:20]:  # Check first 20 visible links
+            text, href = link['text'], link['href']
+            
+            # Skip navigation links
+            if any(skip in link['href_lower'] for skip in ['#', 'javascript:', 'mailto:', '/node/', '/user/']):
+                continue
+            
+            # Skip if it's clearly a navigation link
+            if any(nav in link['text_lower'] for nav in ['home', 'about', 'contact', 'search', 'menu']):
+                continue
+            
+            # If we have a link with href, try it
+            if href.strip():
+                logger.warning(f"⚠️ Using fallback link (method 6): {text or href} (href: {href})")
+                logger.warning(f"   This might not be the correct download link. Please verify.")
+                return chosen(link, text or href or "Link", self.CLICKABLE_SELECTOR)
+        
+        return None, None, None
+    
+    @staticmethod
+    def _make_selector_hint(selector: str, href: str) -> dict:
+        """Build a selector hint whose href pattern tolerates the quarter/year digits changing"""
+        href_suffix = href.rstrip('/').rsplit('/', 1)[-1]
+        return {
+            'primary_selector': selector,
+            'href_pattern': re.sub(r'\d+', r'\\d+', re.escape(href_suffix)),
+        }
+    
+    def _load_selector_hint(self) -> dict | None:
+        """Load the selector hint saved by the last successful browser download"""
+        try:
+            with open(self.selector_hint_path) as f:
+                hint = json.load(f)
+            re.compile(hint['href_pattern'])
+            return hint if hint.get('primary_selector') else None
+        except (OSError, ValueError, KeyError, TypeError, re.error):
+            return None
+    
+    async def download_zip_file(self) -> Path:
+        """
+        Clicks link, accepts terms on the same page, and downloads the ZIP file.
+        
+        Returns:
+            Path: Path to downloaded ZIP file
+        """
+        logger.info("Looking for download link...")
+        
+        # Pages are loaded to DOMContentLoaded only; wait for a download link candidate
+        # to render instead of waiting for the network to go idle. The selector that
+        # worked last time gets a short head start
+        hint = self._load_selector_hint()
+        hint_rendered = False
+        if hint:
             try:
-                logger.info("  ↳ Trying last resort: any visible link on page")
-                all_links = self.page.locator('a[href]:visible')
-                link_count = await all_links.count()
-                logger.info(f"  ↳ Found {link_count} visible links")
-                
-                # Try to find any link that's not a navigation link
-                for i in range(min(link_count, 20)):  # Check first 20 visible links
-                    link = all_links.nth(i)
-                    try:
-                        text = await link.inner_text()
-                        href = await link.get_attribute('href')
-                        
-                        # Skip navigation links
-                        if href and any(skip in href.lower() for skip in ['#', 'javascript:', 'mailto:', '/node/', '/user/']):
-                            continue
-                        
-                        # Skip if it's clearly a navigation link
-                        if text and any(nav in text.lower() for nav in ['home', 'about', 'contact', 'search', 'menu']):
-                            continue
-                        
-                        # If we have a link with href, try it
-                        if href and href.strip():
-                            download_link = link
-                            link_text = text or href or "Link"
-                            logger.warning(f"⚠️ Using fallback link (method 6): {link_text} (href: {href})")
-                            logger.warning(f"   This might not be the correct download link. Please verify.")
-                            break
-                    except:
-                        continue
-            except Exception as e:
-                logger.warning(f"  ↳ Method 6 failed: {e}")
+                await self.page.wait_for_selector(hint['primary_selector'], timeout=3000)
+                hint_rendered = True
+            except Exception:
+                logger.warning(f"  ↳ Saved selector {hint['primary_selector']} not found")
+        if not hint_rendered:
+            try:
+                await self.page.wait_for_selector(
+                    f"{self.LINK_SELECTORS[0]}, {self.LINK_SELECTORS[1]}",
+                    timeout=15000
+                )
+            except Exception:
+                logger.warning("  ↳ No related/file link rendered - scanning page anyway")
+        
+        # Take screenshot for debugging
+        await self._debug_screenshot("page_screenshot.png", full_page=False)
+        
+        # Dump the page once and run every link strategy over the result
+        download_link, link_text, new_hint = await self._find_download_link(hint)
         
         # If still no link found, raise error
         if not download_link:
             # Take final screenshot for debugging
-            try:
-                error_screenshot = self.download_dir / "error_screenshot.png"
-                await self.page.screenshot(path=error_screenshot, full_page=True)
-                logger.error(f"📸 Error screenshot saved: {error_screenshot}")
-            except:
-                pass
+            await self._debug_screenshot("error_screenshot.png")
             
             # Log all links found for debugging
             try:
-                all_links = self.page.locator('a')
-                link_count = await all_links.count()
-                logger.error(f"📋 Total links on page: {link_count}")
+                links = [el for el in await self._dump_links() if el['tag'] == 'a']
+                logger.error(f"📋 Total links on page: {len(links)}")
                 logger.error("📋 First 10 links found:")
-                for i in range(min(link_count, 10)):
-                    try:
-                        link = all_links.nth(i)
-                        text = await link.inner_text()
-                        href = await link.get_attribute('href')
-                        logger.error(f"   Link {i}: text='{text[:60]}' href='{href[:100] if href else 'None'}'")
-                    except:
-                        pass
+                for link in links[:10]:
+                    href = link['href']
+                    logger.error(f"   Link {link['index']}: text='{link['text'][:60]}' href='{href[:100] if href else 'None'}'")
             except:
                 pass
             
             # Log page content for debugging
-            try:
-                page_content = await self.page.content()
-                logger.error(f"Page HTML (first 2000 chars): {page_content[:2000]}")
-            except:
-                pass
+            if self.DEBUG:
+                try:
+                    page_content = await self.page.content()
+                    logger.error(f"Page HTML (first 2000 chars): {page_content[:2000]}")
+                except:
+                    pass
             
-            raise Exception("Could not find download link on page. Page structure may have changed. Check screenshots and logs for details.")
+            raise Exception("Could not find download link on page. Page structure may have changed. Check logs (and screenshots with CLFS_DEBUG=1) for details.")
         
-        # Click the download link
+        # Click the download link. With a saved CMS session the license was already
+        # accepted and the click downloads straight away
         logger.info(f"Clicking download link: {link_text}")
-        await download_link.click()
-        logger.info("Page navigating to license agreement...")
-        await self.page.wait_for_load_state("networkidle")
-        await asyncio.sleep(2)  # Wait for license page to load
-        logger.info("License agreement page loaded.")
-
-        # 2. On the same page (now on the license page), expect the download
-        logger.info("Locating and clicking 'Accept' button...")
+        direct_download: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        
+        def on_download(_download: Download) -> None:
+            if not direct_download.done():
+                direct_download.set_result(None)
+        
+        # One download listener spans both clicks, so a download started by either
+        # of them is never missed between listener registrations
+        self.page.on("download", on_download)
+        try:
+            async with self.page.expect_download(timeout=90000) as download_info:
+                await download_link.click()
+                logger.info("Page navigating to license agreement...")
+                # Wake up on whichever comes first: the Accept button or a direct download
+                accept_visible = asyncio.ensure_future(
+                    self.page.wait_for_selector(self.ACCEPT_SELECTOR, timeout=15000)
+                )
+                try:
+                    await asyncio.wait({direct_download, accept_visible}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if accept_visible.done():
+                        accept_visible.exception()  # A timeout falls through to the accept lookup
+                    else:
+                        accept_visible.cancel()
+                
+                if direct_download.done():
+                    logger.info("✅ License already accepted in saved session, download started directly")
+                else:
+                    logger.info("License agreement page loaded.")
+                    accept_button = await self._find_accept_button()
+                    await accept_button.click()
+                    logger.info("✅ Clicked Accept button")
+        finally:
+            self.page.remove_listener("download", on_download)
+            direct_download.cancel()
+        
+        download = await download_info.value
+        logger.info("Download initiated.")
+        
+        # 3. Save the file
+        zip_filename = download.suggested_filename
+        zip_path = self.staging_dir / zip_filename
+        await download.save_as(zip_path)
+        
+        logger.info(f"Downloaded: {zip_path}")
+        # --- END MODIFICATION ---
+        
+        # Remember which selector found the link so the next run tries it first
+        if new_hint and new_hint != hint:
+            try:
+                with open(self.selector_hint_path, 'w') as f:
+                    json.dump(new_hint, f, indent=2)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not save selector hint: {e}")
+        
+        # Persist the license cookies so the next run can skip the accept step
+        try:
+            await self.context.storage_state(path=self.state_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save CMS session state: {e}")
+        
+        return zip_path
+    
+    async def _find_accept_button(self) -> Locator:
+        """
+        Locate the Accept button on the CMS license agreement page
+        
+        Returns:
+            Locator: The visible Accept (or fallback submit) control
+        """
+        # 2. On the same page (now on the license page), find the Accept control
+        logger.info("Locating 'Accept' button...")
         
         # Try multiple selectors for accept button
         accept_button = None
@@ -354,6 +605,7 @@ class CLFSDownloader:
             await accept_button.wait_for(state='visible', timeout=10000)
             logger.info("✅ Found Accept button (method 1)")
         except Exception as e:
+            accept_button = None
             logger.warning(f"  ↳ Method 1 failed: {e}")
         
         # Strategy 2: Alternative selectors
@@ -366,6 +618,7 @@ class CLFSDownloader:
                 await accept_button.wait_for(state='visible', timeout=10000)
                 logger.info("✅ Found Accept button (method 2)")
             except Exception as e:
+                accept_button = None
                 logger.warning(f"  ↳ Method 2 failed: {e}")
         
         # Strategy 3: Look for any submit button
@@ -380,39 +633,206 @@ class CLFSDownloader:
                     button_text = await accept_button.get_attribute('value') or await accept_button.inner_text()
                     logger.info(f"✅ Found submit button: {button_text}")
             except Exception as e:
+                accept_button = None
                 logger.warning(f"  ↳ Method 3 failed: {e}")
         
         if not accept_button:
             # Take screenshot before error
-            try:
-                error_screenshot = self.download_dir / "accept_button_error.png"
-                await self.page.screenshot(path=error_screenshot, full_page=True)
-                logger.error(f"📸 Error screenshot saved: {error_screenshot}")
-            except:
-                pass
+            await self._debug_screenshot("accept_button_error.png")
             raise Exception("Could not find Accept button on license page")
         
-        # Click the accept button and wait for download
-        async with self.page.expect_download(timeout=60000) as download_info:
-            await accept_button.click()
-            logger.info("✅ Clicked Accept button") 
-            
-        download = await download_info.value
-        logger.info("Download initiated after accepting terms.")
+        return accept_button
+    
+    async def _fetch_page(self, url: str) -> tuple[str, _CMSPageParser]:
+        """GET a page and parse its links and forms. Returns (final_url, parser)"""
+        async with self.session.get(url, allow_redirects=True) as resp:
+            resp.raise_for_status()
+            html = await resp.text()
+            parser = _CMSPageParser()
+            parser.feed(html)
+            return str(resp.url), parser
+    
+    async def _stream_zip_response(self, resp: aiohttp.ClientResponse) -> Path:
+        """Stream a ZIP response body to the download directory"""
+        resp.raise_for_status()
+        zip_filename = resp.content_disposition.filename if resp.content_disposition else None
+        if not zip_filename:
+            zip_filename = unquote(Path(urlparse(str(resp.url)).path).name) or "clfs.zip"
+        zip_path = self.staging_dir / zip_filename
         
-        # 3. Save the file
-        zip_filename = download.suggested_filename
-        zip_path = self.download_dir / zip_filename
-        await download.save_as(zip_path)
+        # Hash while streaming so the cache key needs no second pass over the file
+        digest = hashlib.sha256()
+        async with aiofiles.open(zip_path, 'wb') as f:
+            async for chunk in resp.content.iter_chunked(self.CHUNK_SIZE):
+                digest.update(chunk)
+                await f.write(chunk)
+        sha256 = digest.hexdigest()
         
-        logger.info(f"Downloaded: {zip_path}")
-        # --- END MODIFICATION ---
+        logger.info(f"Downloaded: {zip_path} (sha256 {sha256[:12]})")
         
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if etag or last_modified:
+            zip_path = self._store_in_cache(zip_path, str(resp.url), etag, last_modified, sha256)
         return zip_path
     
+    def _load_cache_index(self) -> dict:
+        """Load the ZIP cache index, or an empty one if missing or unreadable"""
+        try:
+            with open(self.cache_index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _store_in_cache(
+        self,
+        zip_path: Path,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        sha256: str
+    ) -> Path:
+        """
+        Move a freshly downloaded ZIP into the cache and record its validators
+        
+        Args:
+            zip_path: Downloaded ZIP file
+            url: Final URL the ZIP was served from
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+            sha256: SHA-256 of the ZIP, computed while it was streamed
+            
+        Returns:
+            Path: Location of the ZIP inside the cache
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        key = re.sub(r'[^A-Za-z0-9._-]', '', etag or '') or sha256[:16]
+        cached_path = self.cache_dir / f"{key}.zip"
+        os.replace(zip_path, cached_path)
+        
+        index = self._load_cache_index()
+        previous = index.get(self.FILE_URL)
+        if previous and Path(previous['path']) != cached_path:
+            Path(previous['path']).unlink(missing_ok=True)
+        index[self.FILE_URL] = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'sha256': sha256,
+            'path': str(cached_path),
+        }
+        with open(self.cache_index_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        
+        logger.info(f"Cached ZIP at {cached_path}")
+        return cached_path
+    
+    async def download_zip_if_modified(self) -> Path | None:
+        """
+        Revalidate the cached ZIP with a conditional GET against its last download URL
+        
+        Returns:
+            Path: Cached ZIP on 304, a freshly streamed ZIP if CMS served a new one,
+                or None if there is no usable cache entry
+        """
+        entry = self._load_cache_index().get(self.FILE_URL)
+        if not entry or not Path(entry['path']).exists():
+            return None
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        
+        logger.info(f"Checking whether cached ZIP is still current: {entry['url']}")
+        try:
+            async with self.session.get(entry['url'], headers=headers, allow_redirects=True) as resp:
+                if resp.status == 304:
+                    logger.info("✅ CMS file unchanged (304) - using cached ZIP")
+                    return Path(entry['path'])
+                if resp.ok and 'html' not in (resp.content_type or ''):
+                    logger.info("CMS file changed - downloading new ZIP")
+                    return await self._stream_zip_response(resp)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache revalidation failed: {e}")
+        return None
+    
+    async def download_zip_file_http(self) -> Path:
+        """
+        Download the ZIP file without a browser: GET the file page, follow the
+        download link to the license page, POST the Accept form and stream the ZIP.
+        
+        Returns:
+            Path: Path to downloaded ZIP file
+        """
+        logger.info(f"Fetching {self.FILE_URL}")
+        page_url, page = await self._fetch_page(self.FILE_URL)
+        
+        # Prefer direct .zip links, then anything that looks like a download
+        download_href = next((href for _, href in page.links if '.zip' in href.lower()), None)
+        if not download_href:
+            download_href = next(
+                (href for text, href in page.links
+                 if 'download' in text.lower() or 'clfs' in href.lower()),
+                None
+            )
+        if not download_href:
+            raise Exception("Could not find download link on page")
+        
+        download_url = urljoin(page_url, download_href)
+        logger.info(f"Found download link: {download_url}")
+        
+        async with self.session.get(download_url, allow_redirects=True) as resp:
+            resp.raise_for_status()
+            if 'html' not in (resp.content_type or ''):
+                # No license interstitial - the link served the file directly
+                return await self._stream_zip_response(resp)
+            license_url = str(resp.url)
+            license_page = _CMSPageParser()
+            license_page.feed(await resp.text())
+        
+        # Locate the license form and its Accept submit input
+        for form in license_page.forms:
+            accept = next(
+                (i for i in form['inputs']
+                 if (i.get('type') or '').lower() == 'submit'
+                 and 'accept' in (i.get('value') or '').lower()),
+                None
+            )
+            if accept:
+                break
+        else:
+            raise Exception("Could not find Accept button on license page")
+        
+        data = {
+            i['name']: i.get('value') or ''
+            for i in form['inputs']
+            if i.get('name') and (i.get('type') or '').lower() not in ('submit', 'button', 'image')
+        }
+        if accept.get('name'):
+            data[accept['name']] = accept.get('value') or 'Accept'
+        
+        action_url = urljoin(license_url, form['action'] or license_url)
+        logger.info("Accepting license agreement...")
+        if form['method'] == 'post':
+            request = self.session.post(action_url, data=data, allow_redirects=True)
+        else:
+            request = self.session.get(action_url, params=data, allow_redirects=True)
+        async with request as resp:
+            if 'html' in (resp.content_type or ''):
+                raise Exception(f"License acceptance did not return a file (got {resp.content_type})")
+            return await self._stream_zip_response(resp)
+    
+    async def _download_with_browser(self) -> Path:
+        """Playwright fallback: drive Chromium through the file page and license prompt"""
+        await self.initialize_browser()
+        await self.navigate_to_file_page()
+        return await self.download_zip_file()
+    
     def extract_xlsx_from_zip(self, zip_path: Path) -> Path | None:
         """
-        Extract XLSX file from ZIP archive to current directory
+        Extract XLSX file from ZIP archive into the staging directory
         
         Args:
             zip_path: Path to the ZIP file
@@ -423,50 +843,96 @@ class CLFSDownloader:
         logger.info(f"Extracting XLSX from {zip_path.name}...")
         
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # Map the archive so central-directory and member reads hit the page cache
+            # instead of issuing a read() per small region
+            with open(zip_path, 'rb') as f, \
+                    _MappedZip(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    zipfile.ZipFile(mm, 'r') as zip_ref:
                 # List all files in the ZIP
                 file_list = zip_ref.namelist()
                 logger.info(f"Files in ZIP: {file_list}")
                 
-                # Find XLSX file(s)
-                xlsx_files = [f for f in file_list if f.lower().endswith(('.xlsx', '.xls'))]
-                
-                if not xlsx_files:
-                    logger.warning("No XLSX files found in ZIP archive")
-                    return None
+                # Prefer the member following the CMS naming pattern
+                expected = self.EXPECTED_MEMBER_GLOB.lower()
+                xlsx_filename = next(
+                    (f for f in file_list if fnmatch.fnmatch(Path(f).name.lower(), expected)),
+                    None
+                )
                 
-                # Extract the first XLSX file to current directory
-                xlsx_filename = xlsx_files[0]
+                if xlsx_filename is None:
+                    # Find XLSX file(s)
+                    xlsx_files = [f for f in file_list if f.lower().endswith(('.xlsx', '.xls'))]
+                    
+                    if not xlsx_files:
+                        logger.warning("No XLSX files found in ZIP archive")
+                        return None
+                    
+                    # Extract the first XLSX file
+                    xlsx_filename = xlsx_files[0]
                 logger.info(f"Extracting {xlsx_filename}...")
                 
-                # Extract to current directory
-                zip_ref.extract(xlsx_filename, '.')
-                xlsx_path = Path(xlsx_filename)
+                # Stream the member straight to its destination in 1 MiB chunks
+                xlsx_path = self.staging_dir / Path(xlsx_filename).name
+                with zip_ref.open(xlsx_filename) as src, open(xlsx_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, length=self.CHUNK_SIZE)
                 
                 logger.info(f"XLSX file extracted to: {xlsx_path.absolute()}")
                 return xlsx_path
                 
-        except zipfile.BadZipFile:
+        except (zipfile.BadZipFile, ValueError):
+            # mmap raises ValueError for an empty file
             logger.error(f"Invalid ZIP file: {zip_path}")
             return None
         except Exception as e:
             logger.error(f"Error extracting ZIP: {e}")
             return None
     
+    def publish_xlsx(self, xlsx_path: Path) -> Path:
+        """
+        Atomically move the extracted XLSX out of the staging directory
+        
+        Args:
+            xlsx_path: XLSX extracted into the staging directory
+            
+        Returns:
+            Path: Published location (downloads/latest.xlsx)
+        """
+        os.replace(xlsx_path, self.latest_xlsx_path)
+        logger.info(f"Published {xlsx_path.name} as {self.latest_xlsx_path}")
+        return self.latest_xlsx_path
+    
+    def _prune_stale_staging_dirs(self) -> None:
+        """Remove run-* directories left behind by earlier runs (kept on failure with CLFS_DEBUG)"""
+        cutoff = time.time() - self.STALE_STAGING_AGE
+        for path in self.download_dir.glob("run-*"):
+            try:
+                if path.is_dir() and path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    logger.info(f"Removed stale staging directory {path}")
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {e}")
+    
     def cleanup_downloads(self) -> None:
-        """Remove the downloads directory"""
-        if self.download_dir.exists():
-            logger.info("Cleaning up downloads directory...")
-            shutil.rmtree(self.download_dir)
-            logger.info("Cleanup complete")
+        """Remove this run's staging directory"""
+        if not self.staging_dir.exists():
+            return
+        logger.info("Cleaning up staging directory...")
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        logger.info("Cleanup complete")
     
     async def close(self) -> None:
-        """Close browser and cleanup"""
+        """Close HTTP session and browser (safe to call more than once)"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+            logger.info("HTTP session closed")
         if self.browser:
             await self.browser.close()
+            self.browser = self.context = self.page = None
             logger.info("Browser closed")
         if self.playwright:
             await self.playwright.stop()
+            self.playwright = None
             logger.info("Playwright stopped")
     
     async def run(self) -> Path | None:
@@ -476,11 +942,26 @@ class CLFSDownloader:
         Returns:
             Path: Path to extracted XLSX file, or None if failed
         """
+        xlsx_path = None
         try:
-            await self.initialize_browser()
-            await self.navigate_to_file_page()
-            zip_path = await self.download_zip_file()
-            xlsx_path = self.extract_xlsx_from_zip(zip_path)
+            await self.initialize_session()
+            zip_path = await self.download_zip_if_modified()
+            if zip_path is None and self.use_browser:
+                zip_path = await self._download_with_browser()
+            elif zip_path is None:
+                try:
+                    zip_path = await self.download_zip_file_http()
+                except Exception as e:
+                    logger.warning(f"⚠️ Direct HTTP download failed ({e}) - falling back to browser")
+                    zip_path = await self._download_with_browser()
+            # Extract on a worker thread while Chromium and the HTTP session shut down
+            extracted, _ = await asyncio.gather(
+                asyncio.to_thread(self.extract_xlsx_from_zip, zip_path),
+                self.close()
+            )
+            if extracted:
+                xlsx_path = self.publish_xlsx(extracted)
+                self.cleanup_downloads()
             
             return xlsx_path
             
@@ -490,7 +971,11 @@ class CLFSDownloader:
             
         finally:
             await self.close()
-            self.cleanup_downloads()
+            if not xlsx_path:
+                if self.DEBUG:
+                    logger.warning(f"Keeping {self.staging_dir} for debugging")
+                else:
+                    self.cleanup_downloads()
 
 
 async def main():
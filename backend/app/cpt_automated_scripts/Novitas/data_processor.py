@@ -52,7 +52,8 @@ class DataProcessor:
         
         try:
             # Read Excel file - it might have headers in first row
-            df = pd.read_excel(file_path)
+            # Only parse the columns clean_data uses; a missing one is reported there
+            df = pd.read_excel(file_path, usecols=lambda column: column in self.required_columns)
             logger.info(f"✅ Successfully read Excel file with {len(df)} rows")
             logger.info(f"📋 Columns found: {df.columns.tolist()}")
             
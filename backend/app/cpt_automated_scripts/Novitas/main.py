@@ -1,5 +1,4 @@
 import logging
-import math
 from pathlib import Path
 from .scraper import NovitasScraper
 from .data_processor import DataProcessor
@@ -12,23 +11,6 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def clean_nan_values(records: list) -> list:
-    """
-    Convert any NaN values to None for JSON compliance.
-    This is a safety net in case pandas NaN slips through.
-    """
-    cleaned_records = []
-    for record in records:
-        cleaned_record = {}
-        for key, value in record.items():
-            # Check for NaN values (works for both numpy and math nan)
-            if isinstance(value, float) and math.isnan(value):
-                cleaned_record[key] = None
-            else:
-                cleaned_record[key] = value
-        cleaned_records.append(cleaned_record)
-    return cleaned_records
-
 def run_pipeline(headless=False, skip_download=False, file_path=None):
     """
     Complete pipeline: Scrape -> Clean -> Save
@@ -69,32 +51,27 @@ def run_pipeline(headless=False, skip_download=False, file_path=None):
         # Validate cleaned data
         processor.validate_cleaned_data(df_cleaned)
         
-        # Convert DataFrame to list of dictionaries for Supabase
-        records = df_cleaned.to_dict('records')
-        
-        # CRITICAL: Clean any remaining NaN values
-        logger.info(f"🧹 Cleaning NaN values from {len(records)} records...")
-        records = clean_nan_values(records)
-        
-        logger.info(f"✅ Prepared {len(records)} records for database")
+        logger.info(f"✅ Prepared {len(df_cleaned)} records for database")
         
         # Log sample record for verification
-        if records:
-            logger.info(f"📋 Sample record: {records[0]}")
+        if len(df_cleaned) > 0:
+            logger.info(f"📋 Sample record: {df_cleaned.iloc[0].to_dict()}")
         
         # Step 3: Save to Supabase
         logger.info("\n" + "=" * 50)
         logger.info("STEP 3: SAVING TO SUPABASE")
         logger.info("=" * 50)
         db = SupabaseHandler()
-        result = db.insert_records(records)
+        # Pass the DataFrame straight through: the handler validates it column-wise
+        # and converts NaN to None while building the records
+        result = db.insert_records(df_cleaned)
         
         # Final Summary
         logger.info("\n" + "=" * 50)
         logger.info("✅ PIPELINE COMPLETED SUCCESSFULLY")
         logger.info("=" * 50)
         logger.info(f"📄 Downloaded: {file_path.name}")
-        logger.info(f"📊 Records processed: {len(records)}")
+        logger.info(f"📊 Records processed: {len(df_cleaned)}")
         logger.info(f"💾 Records inserted: {result['records_inserted']}")
         logger.info(f"🗄️ Table: {result['table']}")
         
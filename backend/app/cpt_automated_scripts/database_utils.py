@@ -3,17 +3,264 @@ Common database utility functions for medical benchmarking data pipelines.
 Provides shared logic for handling composite keys, release dates, and geozip.
 """
 import logging
-from typing import List, Dict, Optional, Tuple
-from supabase import Client
+import hashlib
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import httpx
+import numpy as np
+import pandas as pd
+from postgrest.types import ReturnMethod
+from supabase import create_client, Client, ClientOptions
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+# Connection pool for the PostgREST HTTP client: keep connections warm between
+# chunks instead of httpx's default of 10 connections / 5 s keep-alive
+HTTP_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=300)
+HTTP_TIMEOUT = 60.0
+# Connection attempts retried by the transport (connect errors only, so writes are never replayed)
+HTTP_CONNECT_RETRIES = 3
+
+# Chunk progress is logged for every Nth chunk (and the last) instead of every chunk
+CHUNK_LOG_EVERY = 10
+
+# Chunks upserted in parallel (each worker holds one pooled HTTP/2 connection at most)
+UPSERT_CONCURRENCY = int(os.getenv("SUPABASE_UPSERT_CONCURRENCY", "8"))
+
+# PostgREST error codes for an rpc that isn't in the schema cache ("404" is what postgrest-py
+# reports for a 404 without a JSON body). Only these switch an optional rpc off for the rest
+# of the run; timeouts and server errors fall back for that one call.
+MISSING_RPC_CODES = ("PGRST202", "404")
+
+# Historical table shared by the scrapers (composite key: source, code, release_date, geozip)
+HISTORICAL_TABLE_NAME = "new_updated_historical_medical_benchmarking_data"
+
+# Server-side diff used by filter_unchanged_records: returns [code, geozip] for every posted
+# record that is new or differs from the stored row, so unchanged rows never leave the
+# database. Create it once in the Supabase SQL editor; without it the client-side prefetch
+# is used instead.
+CHANGED_RECORDS_RPC = "check_changed_records"
+CHANGED_RECORDS_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {CHANGED_RECORDS_RPC}(s text, rd text, records jsonb)
+RETURNS jsonb LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(jsonb_agg(jsonb_build_array(r->>'code', r->>'geozip')), '[]'::jsonb)
+    FROM jsonb_array_elements(records) AS r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {HISTORICAL_TABLE_NAME} t
+        WHERE t.source = s
+          AND t.release_date = rd
+          AND t.code = r->>'code'
+          AND t.geozip IS NOT DISTINCT FROM r->>'geozip'
+          AND to_jsonb(t) @> r
+    )
+$$;
+"""
+_changed_records_rpc_available = True
+
+# Server-side merge used by _process_chunk: stages the posted chunk with
+# jsonb_populate_recordset, updates rows matching the composite key (NULL-safe on geozip)
+# and inserts the rest - one round-trip per chunk instead of SELECT + INSERT + UPDATE.
+# Create it once in the Supabase SQL editor; without it the client-side path is used.
+MERGE_RECORDS_RPC = "merge_historical_records"
+MERGE_RECORDS_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {MERGE_RECORDS_RPC}(records jsonb)
+RETURNS jsonb LANGUAGE plpgsql AS $$
+DECLARE
+    cols text;
+    set_cols text;
+    inserted bigint;
+    updated bigint;
+BEGIN
+    -- Columns present in the payload (records in a chunk share the same keys)
+    SELECT string_agg(quote_ident(k), ', '), string_agg(format('%1$I = i.%1$I', k), ', ')
+      INTO cols, set_cols
+      FROM jsonb_object_keys(records->0) AS k;
+
+    EXECUTE format(
+        'UPDATE {HISTORICAL_TABLE_NAME} t SET %s
+           FROM jsonb_populate_recordset(NULL::{HISTORICAL_TABLE_NAME}, $1) i
+          WHERE t.source = i.source AND t.code = i.code AND t.release_date = i.release_date
+            AND t.geozip IS NOT DISTINCT FROM i.geozip', set_cols) USING records;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+
+    EXECUTE format(
+        'INSERT INTO {HISTORICAL_TABLE_NAME} (%1$s)
+         SELECT %1$s FROM jsonb_populate_recordset(NULL::{HISTORICAL_TABLE_NAME}, $1) i
+          WHERE NOT EXISTS (
+              SELECT 1 FROM {HISTORICAL_TABLE_NAME} t
+               WHERE t.source = i.source AND t.code = i.code AND t.release_date = i.release_date
+                 AND t.geozip IS NOT DISTINCT FROM i.geozip)', cols) USING records;
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    RETURN jsonb_build_object('inserted', inserted, 'updated', updated);
+END
+$$;
+"""
+_merge_records_rpc_available = True
+
+# Grouped count used by _check_all_records_exist: existing rows per release_date for a
+# source in one round-trip instead of one count query per date. Create it once in the
+# Supabase SQL editor; without it the per-date count queries are used.
+COUNT_BY_RELEASE_DATE_RPC = "count_by_release_date"
+COUNT_BY_RELEASE_DATE_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {COUNT_BY_RELEASE_DATE_RPC}(source text, dates text[])
+RETURNS TABLE(release_date text, c bigint) LANGUAGE sql STABLE AS $$
+    SELECT t.release_date, count(*)
+    FROM {HISTORICAL_TABLE_NAME} t
+    WHERE t.source = {COUNT_BY_RELEASE_DATE_RPC}.source
+      AND t.release_date = ANY(dates)
+    GROUP BY t.release_date
+$$;
+"""
+_count_by_release_date_rpc_available = True
+
+# Key fingerprint used for sync detection in upsert_records_with_composite_key: md5 of the
+# sorted "code|geozip" keys stored for a (source, release_date), computed in byte order
+# (COLLATE "C") so it matches Python's sorted(). Create it once in the Supabase SQL editor;
+# without it the 50-record sample check is used.
+KEY_FINGERPRINT_RPC = "release_date_key_fingerprint"
+KEY_FINGERPRINT_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {KEY_FINGERPRINT_RPC}(s text, rd text)
+RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT md5(COALESCE(string_agg(k, ',' ORDER BY k COLLATE "C"), ''))
+    FROM (
+        SELECT code || '|' || COALESCE(geozip, '') AS k
+        FROM {HISTORICAL_TABLE_NAME}
+        WHERE source = s AND release_date = rd
+    ) keys
+$$;
+"""
+_key_fingerprint_rpc_available = True
+
+# Existing release_date per (table, source), reused across handler instances for a short while
+RELEASE_DATE_CACHE_TTL = 60.0
+_release_date_cache: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+
+def _is_missing_rpc(error: Exception) -> bool:
+    """
+    Tell an rpc that isn't installed apart from a transient failure (timeout, reset, 5xx).
+    
+    Returns:
+        True if the PostgREST error code says the function doesn't exist
+    """
+    return getattr(error, "code", None) in MISSING_RPC_CODES
+
+
+class _OrjsonClient(httpx.Client):
+    """
+    httpx client that encodes json= request bodies with orjson instead of stdlib json.
+    PostgREST passes insert/update payloads as json=, so this speeds up every chunk.
+    """
+    
+    def build_request(self, method, url, *, content=None, json=None, headers=None, **kwargs) -> httpx.Request:
+        if json is not None and content is None:
+            content = orjson.dumps(json, option=orjson.OPT_SERIALIZE_NUMPY)
+            headers = httpx.Headers(headers)
+            headers["Content-Type"] = "application/json"
+            json = None
+        return super().build_request(method, url, content=content, json=json, headers=headers, **kwargs)
+
+
+def _tuned_client_options() -> Optional[ClientOptions]:
+    """
+    Build client options with a tuned HTTP/2 connection pool (and orjson request bodies
+    when orjson is installed).
+    Disable with SUPABASE_TUNED_HTTP_POOL=0; falls back to supabase defaults when the
+    installed supabase-py has no httpx_client option or h2 is not installed.
+    
+    Returns:
+        ClientOptions with a custom httpx client, or None to use the defaults
+    """
+    if os.getenv("SUPABASE_TUNED_HTTP_POOL", "1").lower() in ("0", "false", "no"):
+        return None
+    try:
+        client_class = _OrjsonClient if orjson is not None else httpx.Client
+        transport = httpx.HTTPTransport(http2=True, limits=HTTP_POOL_LIMITS, retries=HTTP_CONNECT_RETRIES)
+        http_client = client_class(transport=transport, timeout=HTTP_TIMEOUT)
+        return ClientOptions(httpx_client=http_client)
+    except (TypeError, ImportError) as e:
+        logger.warning(f"⚠️ Tuned HTTP pool unavailable ({e}) - using supabase defaults")
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_supabase_client(supabase_url: str, supabase_key: str) -> Client:
+    """
+    Return the process-wide Supabase client for the given credentials.
+    The client is created on first use and reused afterwards, so every pipeline
+    run in the same process shares its HTTP keep-alive connections.
+    
+    Args:
+        supabase_url: Supabase project URL
+        supabase_key: Supabase API key
+        
+    Returns:
+        Shared Supabase client instance
+    """
+    logger.info("🔌 Creating shared Supabase client")
+    options = _tuned_client_options()
+    if options is None:
+        return create_client(supabase_url, supabase_key)
+    return create_client(supabase_url, supabase_key, options=options)
+
+
+def composite_key(record: Dict) -> str:
+    """
+    A prepared record's composite key (source, code, release_date, geozip) as one string.
+    
+    Args:
+        record: Prepared record - source, release_date and geozip are always set by the
+            prepare functions, so they are read directly without fallbacks
+        
+    Returns:
+        "source|code|release_date|geozip" (empty geozip for None)
+    """
+    return f"{record['source']}|{record['code']}|{record['release_date']}|{record['geozip'] or ''}"
+
+
+def composite_key_hash(record: Dict) -> int:
+    """
+    Hash a prepared record's composite key (see composite_key) to a 64-bit integer, so
+    batch dedup keeps one small int per record instead of a 4-tuple.
+    Uses xxh64 when xxhash is installed, otherwise an 8-byte blake2b digest.
+    
+    Args:
+        record: Prepared record
+        
+    Returns:
+        Unsigned 64-bit hash of the composite key
+    """
+    key = composite_key(record).encode()
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(key)
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
 def get_existing_release_date(client: Client, table_name: str, source_name: str) -> Optional[str]:
     """
     Check if records already exist in database for a given source.
     If they exist, return their release_date to ensure we update instead of insert duplicates.
     If no records exist, return None.
+    Found dates are cached per (table, source) for RELEASE_DATE_CACHE_TTL seconds, so
+    re-instantiated handlers don't repeat the round-trip.
     
     Args:
         client: Supabase client instance
@@ -23,6 +270,12 @@ def get_existing_release_date(client: Client, table_name: str, source_name: str)
     Returns:
         Existing release_date if records exist, None otherwise
     """
+    cache_key = (table_name, source_name)
+    cached = _release_date_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < RELEASE_DATE_CACHE_TTL:
+        logger.info(f"📊 Reusing cached release_date: '{cached[1]}' for source '{source_name}'")
+        return cached[1]
+    
     try:
         response = client.table(table_name)\
             .select("release_date")\
@@ -34,6 +287,7 @@ def get_existing_release_date(client: Client, table_name: str, source_name: str)
             existing_date = response.data[0].get('release_date')
             if existing_date:
                 logger.info(f"📊 Found existing records with release_date: '{existing_date}' - will reuse to prevent duplicates")
+                _release_date_cache[cache_key] = (time.monotonic(), existing_date)
                 return existing_date
         
         logger.info(f"📊 No existing records found for source '{source_name}'")
@@ -62,30 +316,26 @@ def prepare_record_for_insertion(
         Prepared record dict, or None if record should be skipped
     """
     # Filter out records with null or empty code
+    # (hot path - runs once per record, so keep lookups minimal and don't log per record)
     code = record.get('code')
-    if not code or (isinstance(code, str) and code.strip() == ''):
+    if not code or (isinstance(code, str) and not code.strip()):
         return None
     
     # Add source field
     record['source'] = source_name
     
-    # Handle geozip
-    if not has_geozip:
-        # Set geozip to NULL if source doesn't have geozip data
-        record['geozip'] = None
-    elif 'geozip' not in record or not record.get('geozip'):
+    # Handle geozip: NULL if source doesn't have geozip data or the value is empty
+    if not has_geozip or not record.get('geozip'):
         record['geozip'] = None
     
     # Handle release_date
-    if 'release_date' not in record or not record.get('release_date'):
+    if not record.get('release_date'):
         if existing_release_date:
             # Reuse existing release_date to match existing records (prevents duplicates)
             record['release_date'] = existing_release_date
-            logger.debug(f"♻️ Reusing existing release_date '{record['release_date']}' for code {code}")
-        elif 'rel_date' in record and record.get('rel_date'):
+        elif record.get('rel_date'):
             # Use rel_date from data (extracted from filename or column name)
             record['release_date'] = record['rel_date']
-            logger.debug(f"📅 Using rel_date '{record['release_date']}' from data for code {code}")
         else:
             logger.warning(f"⚠️ No release_date or rel_date found for code {code} - record will be skipped")
             return None  # Skip records without release_date
@@ -93,22 +343,276 @@ def prepare_record_for_insertion(
     return record
 
 
+def _has_value(column: pd.Series) -> pd.Series:
+    """Vectorized truthiness check for object columns: not null and not an empty string."""
+    return column.notna() & (column.astype(str).str.strip() != '')
+
+
+def prepare_records_for_insertion(
+    records: Union[List[Dict], pd.DataFrame],
+    source_name: str,
+    existing_release_date: Optional[str] = None,
+    has_geozip: bool = False,
+    fallback_rel_date: Optional[str] = None
+) -> List[Dict]:
+    """
+    Bulk version of prepare_record_for_insertion: applies the same column-level rules
+    (drop empty codes, set source and geozip, resolve release_date) in one pandas pass
+    instead of one Python call per record. Pass the cleaned DataFrame directly to skip
+    building intermediate dicts twice.
+    
+    Args:
+        records: Cleaned DataFrame, or record dictionaries, to prepare
+        source_name: Name of the data source
+        existing_release_date: Existing release_date from database (to prevent duplicates)
+        has_geozip: Whether this source has geozip data
+        fallback_rel_date: rel_date to fill in where the data has none (sources without dates)
+        
+    Returns:
+        Prepared records (NaN converted to None); rows without a code or release_date are dropped
+    """
+    if len(records) == 0:
+        return []
+    
+    # Object dtype keeps None as None (numeric columns would otherwise turn it into NaN)
+    if isinstance(records, pd.DataFrame):
+        df = records.astype(object)
+    else:
+        df = pd.DataFrame(records, dtype=object)
+    empty = pd.Series(None, index=df.index, dtype=object)
+    
+    # Filter out records with null or empty code
+    df = df[_has_value(df.get('code', empty))]
+    empty = empty.loc[df.index]
+    
+    # Add source field; geozip is NULL if the source doesn't have it or the value is empty
+    geozip = df.get('geozip', empty)
+    df = df.assign(
+        source=source_name,
+        geozip=geozip.where(_has_value(geozip), None) if has_geozip else None
+    )
+    
+    # Fill missing rel_date with the fallback in one column-wise pass (after the code filter,
+    # so dropped rows are never touched)
+    if fallback_rel_date:
+        rel_date = df.get('rel_date', empty)
+        df = df.assign(rel_date=rel_date.where(_has_value(rel_date), fallback_rel_date))
+    
+    # Handle release_date: keep it if set, else reuse the existing one, else fall back to rel_date
+    release_date = df.get('release_date', empty)
+    fallback = existing_release_date if existing_release_date else df.get('rel_date', empty)
+    release_date = release_date.where(_has_value(release_date), fallback)
+    has_release_date = _has_value(release_date)
+    
+    missing_count = int((~has_release_date).sum())
+    if missing_count > 0:
+        logger.warning(f"⚠️ No release_date or rel_date found for {missing_count} records - they will be skipped")
+    
+    df = df.assign(release_date=release_date)[has_release_date]
+    
+    # NaN -> None for JSON compliance, only in columns that have missing values (clean
+    # columns are passed through untouched), then build dicts column-wise: zipping object
+    # columns is several times faster than DataFrame.to_dict('records')
+    columns = list(df.columns)
+    values = []
+    for column in columns:
+        series = df[column]
+        missing = series.isna()
+        if missing.any():
+            series = series.mask(missing, None)
+        values.append(series.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _changed_records_via_rpc(
+    client: Client,
+    source_name: str,
+    records: List[Dict],
+    batch_size: int
+) -> Optional[List[Dict]]:
+    """
+    Ask the database which records are new or changed via the check_changed_records rpc.
+    
+    Returns:
+        Records that need writing, or None if the rpc is unavailable
+    """
+    global _changed_records_rpc_available
+    if not _changed_records_rpc_available:
+        return None
+    
+    records_by_release_date: Dict[str, List[Dict]] = {}
+    for record in records:
+        records_by_release_date.setdefault(record['release_date'], []).append(record)
+    
+    changed_keys = set()
+    try:
+        for release_date, group in records_by_release_date.items():
+            for i in range(0, len(group), batch_size):
+                response = client.rpc(
+                    CHANGED_RECORDS_RPC,
+                    {"s": source_name, "rd": release_date, "records": group[i:i + batch_size]}
+                ).execute()
+                for code, geozip in response.data or []:
+                    changed_keys.add((release_date, code, geozip))
+    except Exception as e:
+        if _is_missing_rpc(e):
+            logger.warning(f"⚠️ {CHANGED_RECORDS_RPC} rpc unavailable - falling back to prefetch: {e}")
+            _changed_records_rpc_available = False
+        else:
+            logger.warning(f"⚠️ {CHANGED_RECORDS_RPC} rpc failed - using prefetch for this batch: {e}")
+        return None
+    
+    return [
+        record for record in records
+        if (record['release_date'], str(record['code']),
+            None if record['geozip'] is None else str(record['geozip'])) in changed_keys
+    ]
+
+
+def filter_unchanged_records(
+    client: Client,
+    table_name: str,
+    source_name: str,
+    records: List[Dict],
+    page_size: int = 1000
+) -> Tuple[List[Dict], int]:
+    """
+    Drop records whose row already exists in the database with identical values.
+    For the historical table the diff runs server-side via the check_changed_records rpc
+    (see CHANGED_RECORDS_RPC_SQL); otherwise existing rows for the source are fetched
+    up-front (one paged query per release_date). Either way re-runs only send new or
+    changed records instead of no-op UPDATEs.
+    
+    Args:
+        client: Supabase client instance
+        table_name: Name of the database table
+        source_name: Name of the data source
+        records: Prepared, deduplicated records
+        page_size: Records per rpc call / rows per prefetch request (PostgREST caps responses at 1000 by default)
+        
+    Returns:
+        Tuple of (records to upsert, number of unchanged records skipped)
+    """
+    if not records:
+        return records, 0
+    
+    if table_name == HISTORICAL_TABLE_NAME:
+        changed_records = _changed_records_via_rpc(client, source_name, records, page_size)
+        if changed_records is not None:
+            return changed_records, len(records) - len(changed_records)
+    
+    columns = sorted({column for record in records for column in record})
+    release_dates = {r.get('release_date') for r in records if r.get('release_date')}
+    
+    existing_rows = {}
+    try:
+        for release_date in release_dates:
+            offset = 0
+            while True:
+                response = client.table(table_name)\
+                    .select(",".join(columns))\
+                    .eq("source", source_name)\
+                    .eq("release_date", release_date)\
+                    .range(offset, offset + page_size - 1)\
+                    .execute()
+                rows = response.data or []
+                for row in rows:
+                    key = (str(row.get('code')), row.get('release_date'), row.get('geozip'))
+                    existing_rows[key] = row
+                if len(rows) < page_size:
+                    break
+                offset += page_size
+    except Exception as e:
+        logger.warning(f"⚠️ Could not prefetch existing records - upserting all: {e}")
+        return records, 0
+    
+    logger.info(f"📊 Prefetched {len(existing_rows)} existing rows for source '{source_name}'")
+    
+    changed_records = []
+    for record in records:
+        key = (str(record.get('code')), record.get('release_date'), record.get('geozip'))
+        existing = existing_rows.get(key)
+        if existing is not None and all(existing.get(k) == v for k, v in record.items()):
+            continue
+        changed_records.append(record)
+    
+    return changed_records, len(records) - len(changed_records)
+
+
+def iter_chunks(records: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    """
+    Yield successive chunks of records without slicing the whole input up-front.
+    
+    Args:
+        records: Any iterable of records
+        chunk_size: Maximum number of records per chunk
+        
+    Returns:
+        Iterator of record lists
+    """
+    iterator = iter(records)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _keys_match_database(client: Client, source_name: str, records: List[Dict]) -> Optional[bool]:
+    """
+    Compare the composite keys of the records with the keys stored for their
+    release_date(s) via the release_date_key_fingerprint rpc - one call per release_date.
+    
+    Returns:
+        True if the stored keys are exactly the incoming ones, False if not,
+        None if the rpc is unavailable
+    """
+    global _key_fingerprint_rpc_available
+    if not _key_fingerprint_rpc_available:
+        return None
+    
+    keys_by_release_date: Dict[str, List[str]] = {}
+    for record in records:
+        geozip = record.get('geozip')
+        keys_by_release_date.setdefault(record.get('release_date'), []).append(
+            f"{record.get('code')}|{'' if geozip is None else geozip}"
+        )
+    
+    try:
+        for release_date, keys in keys_by_release_date.items():
+            incoming = hashlib.md5(",".join(sorted(keys)).encode()).hexdigest()
+            response = client.rpc(KEY_FINGERPRINT_RPC, {"s": source_name, "rd": release_date}).execute()
+            if response.data != incoming:
+                return False
+    except Exception as e:
+        if _is_missing_rpc(e):
+            logger.warning(f"   ⚠️ {KEY_FINGERPRINT_RPC} rpc unavailable - using sample check: {e}")
+            _key_fingerprint_rpc_available = False
+        else:
+            logger.warning(f"   ⚠️ {KEY_FINGERPRINT_RPC} rpc failed - using sample check this time: {e}")
+        return None
+    return True
+
+
 def upsert_records_with_composite_key(
     client: Client,
     table_name: str,
     source_name: str,
     records: List[Dict],
-    chunk_size: int = 1000
+    chunk_size: int = 1000,
+    concurrency: int = UPSERT_CONCURRENCY,
+    detect_sync: bool = True
 ) -> Dict:
     """
     Insert or update records using manual check-and-update logic for composite unique constraints.
-    Supabase's .upsert() doesn't work properly with composite keys, so we manually check and update.
+    Supabase's .upsert() doesn't work properly with composite keys (NULL geozip never conflicts),
+    so existing rows are matched manually and then updated in bulk by id.
     
     Early Exit Optimization:
-    - Uses small sample (50 records) to quickly detect if database is already synced
+    - For the historical table, compares a fingerprint of the incoming keys with the stored
+      keys (release_date_key_fingerprint rpc) - one call per release_date, no writes
+    - Otherwise uses small sample (50 records) to quickly detect if database is already synced
     - If sample shows 100% existing records, checks if ALL records exist
     - If database is already synced, returns early to avoid unnecessary load
     - Saves 95%+ of processing time and database queries on re-runs
+    - Skipped with detect_sync=False, for batches already reduced to new or changed records
     
     Args:
         client: Supabase client instance
@@ -116,6 +620,10 @@ def upsert_records_with_composite_key(
         source_name: Name of the data source
         records: List of record dictionaries to insert/update
         chunk_size: Number of records to process per chunk (default: 1000)
+        concurrency: Number of chunks processed in parallel
+            (default: UPSERT_CONCURRENCY, 8 unless SUPABASE_UPSERT_CONCURRENCY is set)
+        detect_sync: Whether to check if the database already holds these records
+            (existing keys are assumed to hold the same values)
         
     Returns:
         Dictionary with insertion results
@@ -137,23 +645,50 @@ def upsert_records_with_composite_key(
     
     total_inserted = 0
     total_updated = 0
+    total_unchanged = 0
     total_failed = 0
     failed_chunks = []
     
     try:
+        # OPTIMIZATION: One fingerprint call per release_date instead of the sample upsert
+        keys_match = None
+        if detect_sync and table_name == HISTORICAL_TABLE_NAME:
+            keys_match = _keys_match_database(client, source_name, records)
+            if keys_match:
+                logger.info("=" * 60)
+                logger.info("🔄 DATABASE ALREADY SYNCHRONIZED")
+                logger.info("=" * 60)
+                logger.info(f"✅ All {len(records)} records already exist in database")
+                logger.info(f"✅ Source: '{source_name}'")
+                logger.info(f"✅ Detected via key fingerprint")
+                logger.info("=" * 60)
+                
+                return {
+                    "status": "already_synced",
+                    "records_inserted": 0,
+                    "records_updated": 0,
+                    "records_upserted": 0,
+                    "records_unchanged": len(records),
+                    "records_failed": 0,
+                    "failed_chunks": [],
+                    "table": table_name,
+                    "message": "Database already synchronized - detected via key fingerprint"
+                }
+        
         # OPTIMIZATION: Quick sample check before processing all records
-        if not sample_check_done and len(records) > SAMPLE_SIZE:
+        # (only when no fingerprint answer was available)
+        if detect_sync and keys_match is None and not sample_check_done and len(records) > SAMPLE_SIZE:
             logger.info(f"   🔍 Quick sync check: Testing sample of {SAMPLE_SIZE} records...")
             
             sample = records[:SAMPLE_SIZE]
-            sample_inserted, sample_updated = _process_chunk(
+            sample_inserted, sample_updated, sample_unchanged = _process_chunk(
                 client, table_name, source_name, sample
             )
             
-            logger.info(f"   📊 Sample result: {sample_inserted} new, {sample_updated} existing")
+            logger.info(f"   📊 Sample result: {sample_inserted} new, {sample_updated + sample_unchanged} existing")
             
             # If sample shows 100% existing records, check if database is fully synced
-            if sample_inserted == 0 and sample_updated > 0:
+            if sample_inserted == 0 and sample_updated + sample_unchanged > 0:
                 logger.info(f"   🔍 Sample shows all records exist - checking full database...")
                 
                 if _check_all_records_exist(client, table_name, source_name, records):
@@ -171,6 +706,7 @@ def upsert_records_with_composite_key(
                         "records_inserted": 0,
                         "records_updated": sample_updated,
                         "records_upserted": sample_updated,
+                        "records_unchanged": sample_unchanged,
                         "records_failed": 0,
                         "failed_chunks": [],
                         "table": table_name,
@@ -180,6 +716,7 @@ def upsert_records_with_composite_key(
             # Sample processed, continue with remaining records
             total_inserted += sample_inserted
             total_updated += sample_updated
+            total_unchanged += sample_unchanged
             sample_check_done = True
             
             # Start from after the sample
@@ -187,33 +724,53 @@ def upsert_records_with_composite_key(
         else:
             start_index = 0
         
-        # Process remaining chunks normally
-        for i in range(start_index, len(records), chunk_size):
-            chunk = records[i:i + chunk_size]
-            chunk_num = ((i - start_index) // chunk_size) + 1
-            total_chunks = ((len(records) - start_index) + chunk_size - 1) // chunk_size
-            
-            logger.info(f"   Processing chunk {chunk_num}/{total_chunks} ({len(chunk)} records)...")
-            
-            try:
-                chunk_inserted, chunk_updated = _process_chunk(
-                    client, table_name, source_name, chunk
-                )
-                total_inserted += chunk_inserted
-                total_updated += chunk_updated
-                logger.info(f"   ✅ Chunk {chunk_num} completed: {chunk_inserted} inserted, {chunk_updated} updated")
+        # Process remaining chunks in parallel - each chunk is a handful of
+        # latency-bound HTTP round-trips, so overlapping them cuts wall time
+        # Chunks are sliced lazily and at most 2 x concurrency are in flight, so only
+        # those copies of the records exist at any time
+        total_chunks = -(-(len(records) - start_index) // chunk_size)
+        chunks = iter_chunks(islice(records, start_index, None), chunk_size)
+        max_in_flight = 2 * max(1, concurrency)
+        
+        def run_chunk(chunk_num: int, chunk: List[Dict]) -> Tuple[int, int, int]:
+            if chunk_num % CHUNK_LOG_EVERY == 1 or chunk_num == total_chunks:
+                logger.info("   Processing chunk %d/%d (%d records)...", chunk_num, total_chunks, len(chunk))
+            return _process_chunk(client, table_name, source_name, chunk)
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            in_flight = deque()
+            numbered_chunks = enumerate(chunks, start=1)
+            while True:
+                # Top up the window, then collect the oldest chunk (results stay in order)
+                for chunk_num, chunk in numbered_chunks:
+                    in_flight.append((chunk_num, len(chunk), pool.submit(run_chunk, chunk_num, chunk)))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
                 
-            except Exception as chunk_error:
-                logger.error(f"   ❌ Chunk {chunk_num} failed: {chunk_error}")
-                total_failed += len(chunk)
-                failed_chunks.append(chunk_num)
-                continue
+                chunk_num, chunk_len, future = in_flight.popleft()
+                try:
+                    chunk_inserted, chunk_updated, chunk_unchanged = future.result()
+                    total_inserted += chunk_inserted
+                    total_updated += chunk_updated
+                    total_unchanged += chunk_unchanged
+                    if chunk_num % CHUNK_LOG_EVERY == 0 or chunk_num == total_chunks:
+                        logger.info(
+                            "   ✅ Chunk %d/%d completed - so far %d inserted, %d updated",
+                            chunk_num, total_chunks, total_inserted, total_updated
+                        )
+                    
+                except Exception as chunk_error:
+                    logger.error(f"   ❌ Chunk {chunk_num} failed: {chunk_error}")
+                    total_failed += chunk_len
+                    failed_chunks.append(chunk_num)
         
         if failed_chunks:
             logger.warning(f"⚠️ {len(failed_chunks)} chunk(s) failed: {failed_chunks}")
         
         total_upserted = total_inserted + total_updated
-        logger.info(f"✅ Successfully upserted {total_upserted} records ({total_inserted} inserted, {total_updated} updated)")
+        logger.info(f"✅ Successfully upserted {total_upserted} records ({total_inserted} inserted, {total_updated} updated, {total_unchanged} unchanged)")
         if total_failed > 0:
             logger.warning(f"⚠️ {total_failed} records failed to upsert")
         
@@ -222,6 +779,7 @@ def upsert_records_with_composite_key(
             "records_inserted": total_inserted,
             "records_updated": total_updated,
             "records_upserted": total_upserted,
+            "records_unchanged": total_unchanged,
             "records_failed": total_failed,
             "failed_chunks": failed_chunks,
             "table": table_name
@@ -231,6 +789,26 @@ def upsert_records_with_composite_key(
         raise
 
 
+def _count_per_release_date(
+    client: Client,
+    table_name: str,
+    source_name: str,
+    release_dates: set
+) -> int:
+    """Existing row count for the source, one count query per release_date"""
+    total_existing = 0
+    for release_date in release_dates:
+        response = client.table(table_name)\
+            .select("id", count="exact")\
+            .eq("source", source_name)\
+            .eq("release_date", release_date)\
+            .execute()
+        
+        if hasattr(response, 'count') and response.count is not None:
+            total_existing += response.count
+    return total_existing
+
+
 def _check_all_records_exist(
     client: Client,
     table_name: str,
@@ -244,6 +822,7 @@ def _check_all_records_exist(
     Returns:
         True if all records exist, False otherwise
     """
+    global _count_by_release_date_rpc_available
     try:
         # Get unique release_dates from records
         release_dates = set(r.get('release_date') for r in records if r.get('release_date'))
@@ -252,16 +831,23 @@ def _check_all_records_exist(
             return False
         
         # Count total records in database for this source and release_date(s)
-        total_existing = 0
-        for release_date in release_dates:
-            response = client.table(table_name)\
-                .select("id", count="exact")\
-                .eq("source", source_name)\
-                .eq("release_date", release_date)\
-                .execute()
-            
-            if hasattr(response, 'count') and response.count is not None:
-                total_existing += response.count
+        total_existing = None
+        if table_name == HISTORICAL_TABLE_NAME and _count_by_release_date_rpc_available:
+            try:
+                response = client.rpc(
+                    COUNT_BY_RELEASE_DATE_RPC,
+                    {"source": source_name, "dates": sorted(release_dates)}
+                ).execute()
+                total_existing = sum(int(row['c']) for row in response.data or [])
+            except Exception as e:
+                if _is_missing_rpc(e):
+                    logger.warning(f"   ⚠️ {COUNT_BY_RELEASE_DATE_RPC} rpc unavailable - counting per release_date: {e}")
+                    _count_by_release_date_rpc_available = False
+                else:
+                    logger.warning(f"   ⚠️ {COUNT_BY_RELEASE_DATE_RPC} rpc failed - counting per release_date this time: {e}")
+        
+        if total_existing is None:
+            total_existing = _count_per_release_date(client, table_name, source_name, release_dates)
         
         # If database has same or more records, assume all exist
         # (This is a heuristic - exact matching would be too expensive)
@@ -281,43 +867,61 @@ def _process_chunk(
     table_name: str,
     source_name: str,
     chunk: List[Dict]
-) -> Tuple[int, int]:
+) -> Tuple[int, int, int]:
     """
     Process a single chunk of records: check for existing records and update or insert.
+    For the historical table this is a single merge_historical_records rpc call (see
+    MERGE_RECORDS_RPC_SQL); the client-side SELECT + INSERT + UPDATE path is the fallback,
+    and it skips records whose existing row already holds identical values.
     
     Returns:
-        Tuple of (inserted_count, updated_count)
+        Tuple of (inserted_count, updated_count, unchanged_count)
     """
+    global _merge_records_rpc_available
+    if table_name == HISTORICAL_TABLE_NAME and _merge_records_rpc_available and chunk:
+        try:
+            response = client.rpc(MERGE_RECORDS_RPC, {"records": chunk}).execute()
+            return response.data['inserted'], response.data['updated'], 0
+        except Exception as e:
+            if _is_missing_rpc(e):
+                logger.warning(f"   ⚠️ {MERGE_RECORDS_RPC} rpc unavailable - using client-side merge: {e}")
+                _merge_records_rpc_available = False
+            else:
+                logger.warning(f"   ⚠️ {MERGE_RECORDS_RPC} rpc failed - using client-side merge for this chunk: {e}")
+    
     chunk_inserted = 0
     chunk_updated = 0
+    chunk_unchanged = 0
     
     # Build list of codes to check
     codes_in_chunk = [r.get('code') for r in chunk if r.get('code')]
     release_date_in_chunk = chunk[0].get('release_date') if chunk else None
     
-    # Query for existing records in this chunk (batch check)
+    # Query for existing records in this chunk (batch check), with every column the
+    # records carry so unchanged rows can be told apart from changed ones
+    columns = sorted({column for record in chunk for column in record} | {'id', 'code', 'source', 'release_date', 'geozip'})
     existing_records = {}
     if codes_in_chunk and release_date_in_chunk:
         try:
             response = client.table(table_name)\
-                .select("id, code, source, release_date, geozip")\
+                .select(",".join(columns))\
                 .eq("source", source_name)\
                 .eq("release_date", release_date_in_chunk)\
                 .in_("code", codes_in_chunk)\
                 .execute()
             
             if response.data:
-                logger.debug(f"   🔍 Found {len(response.data)} existing records in database")
-                for existing in response.data:
-                    # Normalize data types to match what's in records
-                    # Convert code to string to ensure consistent matching
-                    code_normalized = str(existing.get('code'))
-                    geozip_normalized = existing.get('geozip')
-                    
-                    key = (existing.get('source'), code_normalized, 
-                           existing.get('release_date'), geozip_normalized)
-                    existing_records[key] = existing.get('id')
-                logger.debug(f"   🔍 Built lookup dict with {len(existing_records)} unique keys")
+                logger.debug("   🔍 Found %d existing records in database", len(response.data))
+                # source and release_date are fixed by the query filters: intern them once so
+                # every key shares the same string objects. Code is normalized to string to
+                # match the records.
+                source_key = sys.intern(source_name)
+                release_date_key = sys.intern(release_date_in_chunk)
+                existing_records = {
+                    (source_key, str(existing['code']), release_date_key, existing['geozip']): existing
+                    for existing in response.data
+                }
+                logger.debug("   🔍 Built lookup dict with %d unique keys", len(existing_records))
         except Exception as check_error:
             logger.warning(f"   ⚠️ Could not check existing records: {check_error}")
     
@@ -326,24 +930,25 @@ def _process_chunk(
     records_to_update = []
     
     for record in chunk:
-        source = record.get('source')
-        code = record.get('code')
-        release_date = record.get('release_date')
-        geozip = record.get('geozip')
-        
         # Normalize code to string to match database lookup
-        code_normalized = str(code)
-        key = (source, code_normalized, release_date, geozip)
+        key = (record['source'], str(record['code']), record['release_date'], record['geozip'])
         
-        if key in existing_records:
-            # Record exists - prepare for update
-            record['id'] = existing_records[key]
-            records_to_update.append(record)
+        existing = existing_records.get(key)
+        if existing is not None:
+            if all(existing.get(k) == v for k, v in record.items()):
+                # Stored row already holds these values - skip the no-op UPDATE
+                chunk_unchanged += 1
+                continue
+            # Record exists - prepare for update (copy, so the caller's record gets no id)
+            records_to_update.append({**record, 'id': existing['id']})
         else:
             # Record doesn't exist - prepare for insert
             records_to_insert.append(record)
     
-    logger.debug(f"   📊 After matching: {len(records_to_insert)} to insert, {len(records_to_update)} to update")
+    logger.debug(
+        "   📊 After matching: %d to insert, %d to update, %d unchanged",
+        len(records_to_insert), len(records_to_update), chunk_unchanged
+    )
     
     # Batch insert new records
     if records_to_insert:
@@ -365,18 +970,190 @@ def _process_chunk(
                         chunk_updated += 1
                     # Silently skip other errors (already logged at batch level)
     
-    # Update existing records
+    # Update existing records in one request: upsert on the primary key, which the
+    # classification above already resolved (the composite key can't be used as the
+    # conflict target because NULL geozip values never conflict in a unique index)
     if records_to_update:
-        for record in records_to_update:
-            try:
-                record_id = record.pop('id')  # Remove id from update data
-                client.table(table_name)\
-                    .update(record)\
-                    .eq("id", record_id)\
-                    .execute()
-                chunk_updated += 1
-            except Exception as update_error:
-                logger.warning(f"   ⚠️ Failed to update record {record.get('code')}: {update_error}")
+        try:
+            client.table(table_name)\
+                .upsert(records_to_update, on_conflict="id", returning=ReturnMethod.minimal)\
+                .execute()
+            chunk_updated += len(records_to_update)
+        except Exception as bulk_update_error:
+            logger.error(f"   ❌ Bulk update failed: {bulk_update_error}")
+            # Fallback: update records one by one
+            for record in records_to_update:
+                try:
+                    record_id = record.pop('id')  # Remove id from update data
+                    client.table(table_name)\
+                        .update(record)\
+                        .eq("id", record_id)\
+                        .execute()
+                    chunk_updated += 1
+                except Exception as update_error:
+                    logger.warning(f"   ⚠️ Failed to update record {record.get('code')}: {update_error}")
     
-    return chunk_inserted, chunk_updated
+    return chunk_inserted, chunk_updated, chunk_unchanged
 
+
+
+class SupabaseHandler:
+    """
+    Handle Supabase database operations for a single data source.
+    Shared by the scrapers that write to the historical table, so validation, dedup and
+    upsert optimizations live in one place.
+    """
+    
+    # Using historical table to store all scraped data
+    # Composite key: (source, code, release_date, geozip)
+    TABLE_NAME = HISTORICAL_TABLE_NAME
+    
+    def __init__(self, source_name: str, fallback_date: Optional[str] = None, has_geozip: bool = False):
+        """
+        Args:
+            source_name: Value stored in the source column
+            fallback_date: rel_date to use when the data has none and nothing is stored yet
+            has_geozip: Whether this source has geozip data (NULL otherwise)
+        """
+        # Load from environment variables
+        self.supabase_url = os.getenv("SUPABASE_URL")
+        self.supabase_key = os.getenv("SUPABASE_KEY")
+        
+        self.table_name = self.TABLE_NAME
+        self.source_name = source_name
+        self.fallback_date = fallback_date
+        self.has_geozip = has_geozip
+        
+        if not self.supabase_url or not self.supabase_key:
+            logger.error(" Missing Supabase credentials. Set SUPABASE_URL and SUPABASE_KEY in .env file.")
+            raise ValueError("Missing Supabase credentials in environment variables")
+        
+        try:
+            self.client: Client = get_supabase_client(self.supabase_url, self.supabase_key)
+            logger.info(f" Supabase client initialized for table: '{self.table_name}'")
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase client: {e}")
+            raise
+    
+    def _validate_and_prepare_records(self, records: Union[List[Dict], pd.DataFrame]) -> List[Dict]:
+        """
+        Validate and prepare records for insertion.
+        Uses release_date from existing records, else rel_date from the data, else fallback_date.
+        """
+        initial_count = len(records)
+        
+        # Check if records already exist - if so, use their release_date to prevent duplicates
+        existing_release_date = get_existing_release_date(
+            self.client, self.table_name, self.source_name
+        )
+        
+        # Missing rel_date is set to the fallback (resolved once here, filled column-wise)
+        fallback_rel_date = (existing_release_date or self.fallback_date) if self.fallback_date else None
+        
+        # Column-level validation in one pandas pass
+        validated_records = prepare_records_for_insertion(
+            records=records,
+            source_name=self.source_name,
+            existing_release_date=existing_release_date,
+            has_geozip=self.has_geozip,
+            fallback_rel_date=fallback_rel_date
+        )
+        
+        filtered_count = initial_count - len(validated_records)
+        if filtered_count > 0:
+            logger.warning(f"⚠️ Filtered out {filtered_count} records with null/empty code or missing release_date")
+        
+        release_date_used = (
+            existing_release_date
+            or self.fallback_date
+            or (validated_records[0].get('release_date') if validated_records else 'N/A')
+        )
+        logger.info(f"✅ Validated {len(validated_records)} records (filtered {filtered_count})")
+        logger.info(f"📅 Using release_date: '{release_date_used}' (reused from existing, from data or fallback)")
+        return validated_records
+    
+    def insert_records(self, records: Union[List[Dict], pd.DataFrame]) -> dict:
+        """
+        Insert multiple records into Supabase.
+        
+        Args:
+            records: Cleaned DataFrame or list of record dictionaries
+        
+        Returns:
+            Summary of insertion results
+        """
+        if len(records) == 0:
+            logger.warning(" No records to insert.")
+            return {"status": "no_records", "records_inserted": 0, "table": self.table_name}
+        
+        # Validate and prepare records (add source, filter null codes)
+        validated_records = self._validate_and_prepare_records(records)
+        
+        if not validated_records:
+            logger.warning("⚠️ No valid records to insert after validation.")
+            return {"status": "no_valid_records", "records_inserted": 0, "table": self.table_name}
+        
+        # Remove duplicates within the batch itself using (source, code, release_date, geozip) as key
+        # Keys are pre-hashed into a packed uint64 array (8 bytes per key, no per-key Python
+        # objects); np.unique on the reversed array finds each hash's last occurrence. A hash
+        # seen once is a unique key. Records sharing a hash are real duplicates or, rarely, a
+        # 64-bit collision, so those are deduplicated on their actual keys - a collision
+        # never drops a distinct record
+        key_hashes = np.fromiter(
+            (composite_key_hash(record) for record in validated_records),
+            dtype=np.uint64,
+            count=len(validated_records)
+        )
+        hashes, first_in_reversed, counts = np.unique(
+            key_hashes[::-1], return_index=True, return_counts=True
+        )
+        last_positions = (len(key_hashes) - 1 - first_in_reversed[counts == 1]).tolist()
+        shared_hashes = hashes[counts > 1]
+        if shared_hashes.size:
+            last_by_key = {}
+            for i in np.flatnonzero(np.isin(key_hashes, shared_hashes)).tolist():
+                last_by_key[composite_key(validated_records[i])] = i
+            last_positions.extend(last_by_key.values())
+        last_positions.sort()
+        deduplicated_records = [validated_records[i] for i in last_positions]
+        duplicates_removed = len(validated_records) - len(deduplicated_records)
+        
+        if duplicates_removed > 0:
+            logger.warning(f"⚠️ Removed {duplicates_removed} duplicate records within batch (same source+code+release_date+geozip)")
+        
+        # Only send rows that are new or whose values changed since the last run
+        deduplicated_records, unchanged_count = filter_unchanged_records(
+            self.client, self.table_name, self.source_name, deduplicated_records
+        )
+        if unchanged_count > 0:
+            logger.info(f"♻️ Skipped {unchanged_count} records already stored with identical values")
+        
+        if not deduplicated_records:
+            logger.info("✅ All records already up to date - nothing to upsert")
+            return {
+                "status": "already_synced",
+                "records_inserted": 0,
+                "records_updated": 0,
+                "records_upserted": 0,
+                "records_failed": 0,
+                "records_unchanged": unchanged_count,
+                "failed_chunks": [],
+                "table": self.table_name
+            }
+        
+        logger.info(f"📤 Upserting {len(deduplicated_records)} records into '{self.table_name}'...")
+        logger.info(f"   (Will update existing records or insert new ones based on source+code+release_date+geozip)")
+        logger.info(f"   Processing in chunks of 1000 records to avoid bulk insert failures...")
+        
+        result = upsert_records_with_composite_key(
+            client=self.client,
+            table_name=self.table_name,
+            source_name=self.source_name,
+            records=deduplicated_records,
+            chunk_size=1000,
+            # filter_unchanged_records already dropped identical rows, so every remaining
+            # record must be written - the existence-based sync check would skip updates
+            detect_sync=False
+        )
+        result["records_unchanged"] = result.get("records_unchanged", 0) + unchanged_count
+        return result
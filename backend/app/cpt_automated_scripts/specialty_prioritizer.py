@@ -3,21 +3,52 @@ Specialty Prioritization Script - Phase 5 Milestone 6
 Implements multi-factor weighted scoring to determine specialty priority hierarchy
 """
 
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Dict, Optional
-from pathlib import Path
-import sys
-from supabase import create_client, Client
+from typing import List, Dict, Optional, Tuple
+from postgrest.types import ReturnMethod
+from supabase import Client
 import os
 import dotenv
+from functools import lru_cache
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent))
+from .database_utils import get_supabase_client
 
 logger = logging.getLogger(__name__)
 dotenv.load_dotenv()
 
+# Main table whose codes get specialty priorities
+CPT_CODES_TABLE = "new_updated_medical_benchmarking_data"
+
+# Server-side DISTINCT used by fetch_unique_cpt_codes: returns the unique codes as one jsonb
+# array (a single value, so it isn't truncated by PostgREST's max-rows limit). Create it once
+# in the Supabase SQL editor; without it the code column is fetched and deduplicated here.
+DISTINCT_CPT_CODES_RPC = "distinct_cpt_codes"
+DISTINCT_CPT_CODES_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {DISTINCT_CPT_CODES_RPC}()
+RETURNS jsonb LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(jsonb_agg(DISTINCT code), '[]'::jsonb)
+    FROM {CPT_CODES_TABLE}
+    WHERE code IS NOT NULL AND code <> ''
+$$;
+"""
+
+# Letters stripped before reading the numeric part of a CPT code (one translate pass)
+_CPT_LETTERS = str.maketrans('', '', 'TUMGJ')
+# Range specificity has always stripped only the Category III/PLA/MAAA suffixes
+_SPECIFICITY_LETTERS = str.maketrans('', '', 'TUM')
+
+
+@lru_cache(maxsize=None)
+def _code_to_int(code: str) -> Optional[int]:
+    """Numeric part of a CPT code, or None if it doesn't parse (cached: codes repeat across ranges)"""
+    try:
+        return int(code.translate(_CPT_LETTERS))
+    except (ValueError, AttributeError):
+        return None
+
+
 class SpecialtyPrioritizer:
     """Calculate priority scores for CPT code specialty mappings"""
     
@@ -61,30 +92,45 @@ class SpecialtyPrioritizer:
         'Pediatric Hand Surgery': 4,
     }
     
+    # Priority level by rank within a CPT code; lower-ranked specialties are 'other'
+    PRIORITY_LEVELS = ('primary', 'secondary', 'tertiary')
+    
     def __init__(self, supabase_client: Optional[Client] = None):
         """Initialize prioritizer with optional Supabase client"""
         if supabase_client:
             self.client = supabase_client
         else:
-            # Initialize Supabase client
+            # Reuse the process-wide pooled Supabase client
             supabase_url = os.getenv("SUPABASE_URL")
             supabase_key = os.getenv("SUPABASE_KEY")
             if not supabase_url or not supabase_key:
                 raise ValueError("Missing Supabase credentials")
-            self.client = create_client(supabase_url, supabase_key)
+            self.client = get_supabase_client(supabase_url, supabase_key)
     
     def get_hierarchy_score(self, specialty: str) -> int:
         """Get hierarchy level for specialty (lower number = higher priority)"""
         return self.SPECIALTY_HIERARCHY.get(specialty, 2)  # Default to level 2
     
+    def get_hierarchy_levels(self, specialties: List[str]) -> np.ndarray:
+        """
+        Vectorized get_hierarchy_score (default level 2).
+        Specialties repeat heavily across ranges, so each distinct name is looked up once
+        and the per-range levels are gathered by categorical code.
+        """
+        categories = pd.Categorical(specialties)
+        category_levels = np.array(
+            [self.get_hierarchy_score(specialty) for specialty in categories.categories], dtype=np.int64
+        )
+        return category_levels[categories.codes]
+    
     def calculate_range_specificity(self, cpt_start: str, cpt_end: str, total_possible_codes: int = 99999) -> float:
         """
         Calculate range specificity score.
         Narrower ranges = more specialized = higher priority
         """
         try:
-            start_num = int(cpt_start.replace('T', '').replace('U', '').replace('M', ''))
-            end_num = int(cpt_end.replace('T', '').replace('U', '').replace('M', ''))
+            start_num = int(cpt_start.translate(_SPECIFICITY_LETTERS))
+            end_num = int(cpt_end.translate(_SPECIFICITY_LETTERS))
             range_width = end_num - start_num + 1
             
             if range_width <= 0:
@@ -101,6 +147,39 @@ class SpecialtyPrioritizer:
             # If we can't parse, return neutral score
             return 1.0
     
+    def calculate_range_specificity_batch(
+        self,
+        range_starts: List[str],
+        range_ends: List[str],
+        total_possible_codes: int = 99999
+    ) -> np.ndarray:
+        """
+        Vectorized calculate_range_specificity over many ranges.
+        
+        Args:
+            range_starts: Range start codes
+            range_ends: Range end codes (same length as range_starts)
+            total_possible_codes: Size of the code space used to normalize widths
+            
+        Returns:
+            Array of specificity scores (1.0 where a range doesn't parse or is empty)
+        """
+        start_nums = np.empty(len(range_starts), dtype=np.int64)
+        end_nums = np.empty(len(range_ends), dtype=np.int64)
+        parsed = np.ones(len(range_starts), dtype=bool)
+        for i, (start, end) in enumerate(zip(range_starts, range_ends)):
+            try:
+                start_nums[i] = int(start.translate(_SPECIFICITY_LETTERS))
+                end_nums[i] = int(end.translate(_SPECIFICITY_LETTERS))
+            except (ValueError, AttributeError):
+                parsed[i] = False
+        
+        range_width = end_nums - start_nums + 1
+        valid = parsed & (range_width > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            specificity = np.minimum(1 / (range_width / total_possible_codes + 0.0001), 10.0)
+        return np.where(valid, specificity, 1.0)
+    
     def calculate_frequency_weighting(self, specialty: str, specialty_size: int, avg_specialty_size: float) -> float:
         """
         Calculate frequency weighting factor.
@@ -164,6 +243,55 @@ class SpecialtyPrioritizer:
         
         return round(total_score, 2)
     
+    def calculate_priority_scores_batch(
+        self,
+        specialties: List[str],
+        range_starts: List[str],
+        range_ends: List[str],
+        specialty_sizes: Dict[str, int],
+        avg_specialty_size: float
+    ) -> np.ndarray:
+        """
+        Vectorized calculate_priority_score over many specialty ranges.
+        The score doesn't depend on the CPT code, so it is computed once per range.
+        
+        Args:
+            specialties: Specialty name per range
+            range_starts: Range start code per range
+            range_ends: Range end code per range
+            specialty_sizes: Number of ranges per specialty
+            avg_specialty_size: Mean of specialty_sizes
+            
+        Returns:
+            Array of priority scores, rounded like calculate_priority_score
+        """
+        # Range specificity (30%)
+        range_score = self.calculate_range_specificity_batch(range_starts, range_ends)
+        
+        # Medical hierarchy (25%) - invert so higher hierarchy = higher score
+        hierarchy_level = self.get_hierarchy_levels(specialties)
+        hierarchy_score = 11 - hierarchy_level
+        
+        # Frequency weighting (20%)
+        if avg_specialty_size == 0:
+            frequency_score = np.ones(len(specialties))
+        else:
+            sizes = np.array([specialty_sizes.get(spec, 1000) for spec in specialties], dtype=float)
+            ratio = sizes / avg_specialty_size
+            frequency_score = np.select([ratio < 0.5, ratio > 2.0], [1.5, 0.8], default=1.0)
+        
+        # Overlap resolution (15%) and usage validation (10%) are placeholders (1.0)
+        total_score = (
+            range_score * 0.30 +
+            hierarchy_score * 0.25 +
+            frequency_score * 0.20 +
+            1.0 * 0.15 +
+            1.0 * 0.10
+        )
+        
+        # Python's round() so ties round exactly like calculate_priority_score
+        return np.array([round(score, 2) for score in total_score.tolist()], dtype=float)
+    
     def prioritize_specialties_for_cpt(
         self,
         cpt_code: str,
@@ -175,63 +303,135 @@ class SpecialtyPrioritizer:
         
         Returns list of specialties with priority levels assigned.
         """
-        applicable_specialties = []
         avg_specialty_size = sum(specialty_sizes.values()) / len(specialty_sizes) if specialty_sizes else 1000
+        range_starts, range_ends, range_specialties = self._range_columns(specialty_ranges)
         
-        for _, specialty_row in specialty_ranges.iterrows():
-            range_start = str(specialty_row.get('cpt_start', ''))
-            range_end = str(specialty_row.get('cpt_end', range_start))
-            specialty = str(specialty_row.get('specialty', ''))
-            
-            # Check if CPT code falls within this range
-            if self._cpt_in_range(cpt_code, range_start, range_end):
-                specialty_size = specialty_sizes.get(specialty, 1000)
-                
-                score = self.calculate_priority_score(
-                    cpt_code=cpt_code,
-                    specialty=specialty,
-                    range_start=range_start,
-                    range_end=range_end,
-                    specialty_size=specialty_size,
-                    avg_specialty_size=avg_specialty_size
-                )
-                
-                applicable_specialties.append({
-                    'specialty': specialty,
-                    'score': score,
-                    'range_start': range_start,
-                    'range_end': range_end,
-                    'hierarchy_level': self.get_hierarchy_score(specialty),
-                    'evidence_basis': 'range_specificity'  # Can be enhanced
-                })
-        
-        # Sort by score (descending) and assign priority levels
-        applicable_specialties.sort(key=lambda x: x['score'], reverse=True)
-        
-        for i, specialty in enumerate(applicable_specialties):
-            if i == 0:
-                specialty['priority_level'] = 'primary'
-            elif i == 1:
-                specialty['priority_level'] = 'secondary'
-            elif i == 2:
-                specialty['priority_level'] = 'tertiary'
-            else:
-                specialty['priority_level'] = 'other'
+        # Ranges that include this CPT code
+        _, matched = self._match_codes_to_ranges([cpt_code], range_starts, range_ends)
+        matched = matched.tolist()
+        starts = [range_starts[r] for r in matched]
+        ends = [range_ends[r] for r in matched]
+        specialties = [range_specialties[r] for r in matched]
+        
+        scores = self.calculate_priority_scores_batch(
+            specialties, starts, ends, specialty_sizes, avg_specialty_size
+        )
+        hierarchy_levels = self.get_hierarchy_levels(specialties).tolist()
+        
+        # Sort by score (descending, stable so ties keep range order) and assign priority levels
+        applicable_specialties = [
+            {
+                'specialty': specialties[i],
+                'score': scores[i].item(),
+                'range_start': starts[i],
+                'range_end': ends[i],
+                'hierarchy_level': hierarchy_levels[i],
+                'evidence_basis': 'range_specificity',  # Can be enhanced
+                'priority_level': self.PRIORITY_LEVELS[rank] if rank < len(self.PRIORITY_LEVELS) else 'other'
+            }
+            for rank, i in enumerate(np.argsort(-scores, kind='stable').tolist())
+        ]
         
         return applicable_specialties
     
-    def _cpt_in_range(self, cpt_code: str, range_start: str, range_end: str) -> bool:
-        """Check if CPT code falls within the given range"""
-        try:
-            # Extract numeric part from CPT code
-            code_num = int(cpt_code.replace('T', '').replace('U', '').replace('M', '').replace('G', '').replace('J', ''))
-            start_num = int(range_start.replace('T', '').replace('U', '').replace('M', '').replace('G', '').replace('J', ''))
-            end_num = int(range_end.replace('T', '').replace('U', '').replace('M', '').replace('G', '').replace('J', ''))
+    # Codes matched against all ranges per vectorized block (bounds the block's bool matrix)
+    MATCH_BLOCK_SIZE = 1024
+    
+    @staticmethod
+    def _range_value_str(value) -> str:
+        """Render a specialty range cell as a string ('nan' when missing)"""
+        return 'nan' if value is None else str(value)
+    
+    def _range_columns(self, specialty_ranges: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Range start, end and specialty columns as strings, read once per DataFrame.
+        
+        Returns:
+            Tuple of (range_starts, range_ends, range_specialties); a missing cpt_end
+            column means single-code ranges
+        """
+        def column_strs(column: str) -> Optional[List[str]]:
+            if column not in specialty_ranges.columns:
+                return None
+            return [self._range_value_str(v) for v in specialty_ranges[column]]
+        
+        range_starts = column_strs('cpt_start') or [''] * len(specialty_ranges)
+        range_ends = column_strs('cpt_end') or range_starts
+        range_specialties = column_strs('specialty') or [''] * len(specialty_ranges)
+        return range_starts, range_ends, range_specialties
+    
+    def _match_codes_to_ranges(
+        self,
+        cpt_codes: List[str],
+        range_starts: List[str],
+        range_ends: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find every (code, range) pair where the code falls within the range.
+        Codes and range bounds are parsed to integers once (T/U/M/G/J stripped) and
+        compared numerically; pairs where the code or either bound doesn't parse fall back
+        to string comparison (range_start <= code <= range_end).
+        
+        Returns:
+            (code_index, range_index) arrays of matching pairs, ordered by code then range
+        """
+        code_nums = [_code_to_int(c) for c in cpt_codes]
+        start_nums = [_code_to_int(s) for s in range_starts]
+        end_nums = [_code_to_int(e) for e in range_ends]
+        
+        code_ok = np.array([n is not None for n in code_nums], dtype=bool)
+        range_ok = np.array(
+            [s is not None and e is not None for s, e in zip(start_nums, end_nums)], dtype=bool
+        )
+        code_num = np.array([n if n is not None else 0 for n in code_nums], dtype=np.int64)
+        start_num = np.array([n if n is not None else 0 for n in start_nums], dtype=np.int64)
+        end_num = np.array([n if n is not None else 0 for n in end_nums], dtype=np.int64)
+        
+        code_str = np.array(cpt_codes, dtype=str)
+        start_str = np.array(range_starts, dtype=str)
+        end_str = np.array(range_ends, dtype=str)
+        string_ranges = ~range_ok
+        
+        code_indices = []
+        range_indices = []
+        for block_start in range(0, len(cpt_codes), self.MATCH_BLOCK_SIZE):
+            block = slice(block_start, block_start + self.MATCH_BLOCK_SIZE)
+            codes = code_num[block][:, None]
+            mask = (start_num <= codes) & (codes <= end_num)
+            mask &= code_ok[block][:, None] & range_ok
             
-            return start_num <= code_num <= end_num
-        except (ValueError, AttributeError):
-            # If parsing fails, do string comparison
-            return range_start <= cpt_code <= range_end
+            # String comparison for unparsable codes (all ranges) and unparsable ranges (all codes)
+            string_codes = ~code_ok[block]
+            if string_codes.any() or string_ranges.any():
+                codes_s = code_str[block][:, None]
+                string_pairs = string_codes[:, None] | string_ranges
+                mask |= string_pairs & (start_str <= codes_s) & (codes_s <= end_str)
+            
+            rows, cols = np.nonzero(mask)
+            code_indices.append(rows + block_start)
+            range_indices.append(cols)
+        
+        if not code_indices:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(code_indices), np.concatenate(range_indices)
+    
+    def fetch_unique_cpt_codes(self) -> List[str]:
+        """
+        Unique CPT codes in the main table, deduplicated server-side via the
+        distinct_cpt_codes rpc (see DISTINCT_CPT_CODES_RPC_SQL) when it exists.
+        
+        Returns:
+            List of unique, non-empty CPT codes
+        """
+        try:
+            response = self.client.rpc(DISTINCT_CPT_CODES_RPC).execute()
+            if isinstance(response.data, list):
+                return [code for code in response.data if code]
+        except Exception as e:
+            logger.warning(f"{DISTINCT_CPT_CODES_RPC} rpc unavailable - fetching the code column instead: {e}")
+        
+        cpt_result = self.client.table(CPT_CODES_TABLE).select('code').execute()
+        return list(set([row['code'] for row in cpt_result.data if row.get('code')]))
     
     def process_all_cpt_specialties(self) -> List[Dict]:
         """
@@ -259,33 +459,42 @@ class SpecialtyPrioritizer:
         
         # Get all unique CPT codes from main table
         logger.info("Fetching all CPT codes from database...")
-        cpt_result = self.client.table('new_updated_medical_benchmarking_data').select('code').execute()
-        unique_codes = list(set([row['code'] for row in cpt_result.data if row.get('code')]))
+        unique_codes = self.fetch_unique_cpt_codes()
         
         logger.info(f"Processing {len(unique_codes)} unique CPT codes...")
         
-        results = []
-        for i, cpt_code in enumerate(unique_codes):
-            if i % 1000 == 0:
-                logger.info(f"Processed {i}/{len(unique_codes)} codes...")
-            
-            priorities = self.prioritize_specialties_for_cpt(
-                cpt_code=cpt_code,
-                specialty_ranges=specialty_ranges_df,
-                specialty_sizes=specialty_sizes
-            )
-            
-            for p in priorities:
-                results.append({
-                    'cpt_code': cpt_code,
-                    'specialty': p['specialty'],
-                    'priority_level': p['priority_level'],
-                    'priority_score': p['score'],
-                    'range_start': p['range_start'],
-                    'range_end': p['range_end'],
-                    'hierarchy_level': p['hierarchy_level'],
-                    'evidence_basis': p['evidence_basis']
-                })
+        range_starts, range_ends, range_specialties = self._range_columns(specialty_ranges_df)
+        avg_specialty_size = sum(specialty_sizes.values()) / len(specialty_sizes) if specialty_sizes else 1000
+        
+        # Range-join every code against every range in vectorized blocks
+        code_idx, range_idx = self._match_codes_to_ranges(unique_codes, range_starts, range_ends)
+        logger.info(f"Matched {len(code_idx)} (code, specialty range) pairs")
+        
+        # Score and look up the hierarchy level of each range once, then gather per matched pair
+        range_hierarchy = self.get_hierarchy_levels(range_specialties).tolist()
+        range_scores = self.calculate_priority_scores_batch(
+            range_specialties, range_starts, range_ends, specialty_sizes, avg_specialty_size
+        )
+        scores = range_scores[range_idx]
+        
+        # Per code, highest score first; lexsort is stable so ties keep range order
+        order = np.lexsort((-scores, code_idx))
+        code_idx, range_idx, scores = code_idx[order], range_idx[order], scores[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(code_idx)) + 1] if len(code_idx) else np.array([], dtype=np.int64)
+        ranks = np.arange(len(code_idx)) - np.repeat(group_start, np.diff(np.r_[group_start, len(code_idx)]))
+        results = [
+            {
+                'cpt_code': unique_codes[c],
+                'specialty': range_specialties[r],
+                'priority_level': self.PRIORITY_LEVELS[rank] if rank < len(self.PRIORITY_LEVELS) else 'other',
+                'priority_score': score,
+                'range_start': range_starts[r],
+                'range_end': range_ends[r],
+                'hierarchy_level': range_hierarchy[r],
+                'evidence_basis': 'range_specificity'  # Can be enhanced
+            }
+            for c, r, score, rank in zip(code_idx.tolist(), range_idx.tolist(), scores.tolist(), ranks.tolist())
+        ]
         
         logger.info(f"Generated {len(results)} specialty priority records")
         return results
@@ -305,9 +514,11 @@ class SpecialtyPrioritizer:
         for i in range(0, len(records), chunk_size):
             chunk = records[i:i + chunk_size]
             try:
-                result = self.client.table('cpt_specialty_mapping_enhanced').upsert(
+                # returning=minimal: PostgREST doesn't echo the 1000 upserted rows back
+                self.client.table('cpt_specialty_mapping_enhanced').upsert(
                     chunk,
-                    on_conflict='cpt_code,specialty'
+                    on_conflict='cpt_code,specialty',
+                    returning=ReturnMethod.minimal
                 ).execute()
                 total_inserted += len(chunk)
                 logger.info(f"Inserted chunk {i//chunk_size + 1} ({len(chunk)} records)")
@@ -4,8 +4,11 @@ FastAPI Main Application
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 
 from app.core.config import settings
 from app.core.database import db
@@ -50,6 +53,8 @@ async def lifespan(app: FastAPI):
     try:
         from app.services.docker_service import get_docker_service
         docker_service = get_docker_service()
+        # Image check/pull runs in the background - startup doesn't wait for it
+        docker_service.start_image_prepull()
         logger.info("✅ Docker service initialized")
     except Exception as e:
         logger.error(f"❌ Failed to initialize Docker service: {e}")
@@ -129,10 +134,18 @@ async def root():
     return response
 
 
-@app.get("/health")
-async def health_check():
+# /health results are served from this cache for a short while, so frequent load balancer
+# probes don't each hit the database client
+HEALTH_CACHE_TTL = 2.0
+# The database probe runs in a worker thread and is abandoned after this many seconds
+HEALTH_PROBE_TIMEOUT = 1.0
+_health_cache = {"ts": 0.0, "payload": None}
+_health_lock = asyncio.Lock()
+
+
+def _probe_health() -> dict:
     """
-    Health check endpoint
+    Run the actual health probe (database connection check)
     """
     try:
         # Test database connection
@@ -153,6 +166,77 @@ async def health_check():
         }
 
 
+async def _run_health_probe() -> dict:
+    """
+    Run _probe_health off the event loop (the Supabase client is synchronous), failing
+    fast instead of stalling when it doesn't answer within HEALTH_PROBE_TIMEOUT
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(_probe_health), timeout=HEALTH_PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Health check failed: database probe timed out after {HEALTH_PROBE_TIMEOUT}s")
+        return {
+            "status": "unhealthy",
+            "version": settings.APP_VERSION,
+            "database": "disconnected",
+            "error": "database probe timed out"
+        }
+
+
+def _cached_health() -> dict | None:
+    """
+    Cached health payload, or None once it is older than HEALTH_CACHE_TTL
+    """
+    if _health_cache["payload"] is not None and time.monotonic() - _health_cache["ts"] < HEALTH_CACHE_TTL:
+        return _health_cache["payload"]
+    return None
+
+
+async def _get_health() -> dict:
+    """
+    Health payload, re-probed at most once per HEALTH_CACHE_TTL seconds
+    """
+    payload = _cached_health()
+    if payload is not None:
+        return payload
+    
+    # Single-flight: a burst of concurrent requests triggers one probe
+    async with _health_lock:
+        payload = _cached_health()
+        if payload is None:
+            payload = await _run_health_probe()
+            _health_cache["payload"] = payload
+            _health_cache["ts"] = time.monotonic()
+        return payload
+
+
+@app.get("/health")
+async def health_check():
+    """
+    Health check endpoint (cached for HEALTH_CACHE_TTL seconds)
+    """
+    return await _get_health()
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness probe - no I/O, only reports that the process is serving requests
+    """
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe - database check (cached), 503 when the database is unreachable
+    """
+    payload = await _get_health()
+    if payload["status"] != "healthy":
+        return JSONResponse(status_code=503, content=payload)
+    return payload
+
+
 if __name__ == "__main__":
     import uvicorn
     
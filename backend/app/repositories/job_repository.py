@@ -2,17 +2,143 @@
 Job Repository - Data access layer for scraper jobs
 """
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
+from datetime import datetime, timezone
+import asyncio
+import base64
 import logging
-from supabase import Client
+import threading
+import time
+import uuid
 
 from app.api.models import JobStatus, JobCreate, JobUpdate, JobResponse
 from app.core.database import get_db
 from app.utils.helpers import calculate_duration
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 logger = logging.getLogger(__name__)
 
+# Grouped count used by get_job_statistics: one round-trip instead of one count query per
+# status. Create it once in the Supabase SQL editor; without it the per-status counts are used.
+STATUS_COUNTS_RPC = "get_job_status_counts"
+STATUS_COUNTS_RPC_SQL = f"""
+CREATE OR REPLACE FUNCTION {STATUS_COUNTS_RPC}()
+RETURNS TABLE(status text, cnt bigint) LANGUAGE sql STABLE AS $$
+    SELECT j.status::text, count(*) FROM scraper_jobs j GROUP BY j.status
+$$;
+"""
+_status_counts_rpc_available = True
+
+# PostgREST error codes for a function that isn't in the schema cache ("404" is what
+# postgrest-py reports for a 404 without a JSON body). Only these switch an optional
+# rpc off for good; timeouts and server errors fall back for that one call.
+MISSING_FUNCTION_CODES = ("PGRST202", "404")
+
+
+def _is_missing_from_schema(error: Exception, codes: Tuple[str, ...]) -> bool:
+    """
+    Check whether a PostgREST error says the rpc/column isn't there, rather than a transient failure
+    
+    Args:
+        error: Exception raised by the query
+        codes: PostgREST/Postgres error codes that mean "missing"
+    
+    Returns:
+        bool: True if the error carries one of codes
+    """
+    return getattr(error, "code", None) in codes
+
+# Computed field for job duration: PostgREST exposes functions taking the row type as
+# selectable columns, so get_job_history can select duration_seconds next to the job columns
+# instead of parsing timestamps per job in Python. Truncates like calculate_duration; NULL if either is missing.
+DURATION_FIELD_SQL = """
+CREATE OR REPLACE FUNCTION duration_seconds(scraper_jobs)
+RETURNS integer LANGUAGE sql IMMUTABLE AS $$
+    SELECT trunc(extract(epoch FROM ($1.completed_at - $1.started_at)))::integer
+$$;
+"""
+_duration_field_available = True
+
+# Errors meaning duration_seconds isn't there: undefined column (42703), or the computed
+# field / relationship missing from the schema cache (PGRST200, PGRST202)
+MISSING_COLUMN_CODES = ("42703", "PGRST200", "PGRST202")
+
+# Status timestamps: a BEFORE UPDATE trigger stamps the column below when status changes, so
+# update_job_status sends only the status. Until the trigger is installed (detected by the
+# column coming back NULL) the timestamp is set from Python as before.
+STATUS_TIMESTAMP_COLUMNS = {
+    JobStatus.APPROVED.value: "approved_at",
+    JobStatus.RUNNING.value: "started_at",
+    JobStatus.COMPLETED.value: "completed_at",
+    JobStatus.FAILED.value: "completed_at",
+    JobStatus.CANCELLED.value: "completed_at",
+}
+STATUS_TIMESTAMPS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION set_status_ts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    CASE NEW.status::text
+        WHEN 'approved' THEN NEW.approved_at := now();
+        WHEN 'running' THEN NEW.started_at := now();
+        WHEN 'completed', 'failed', 'cancelled' THEN NEW.completed_at := now();
+        ELSE NULL;
+    END CASE;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS set_status_timestamps ON scraper_jobs;
+CREATE TRIGGER set_status_timestamps BEFORE UPDATE ON scraper_jobs
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION set_status_ts();
+"""
+_status_timestamps_trigger_available = True
+
+
+def _encode_history_cursor(job: Dict[str, Any]) -> str:
+    """
+    Build the opaque get_job_history cursor pointing after the given job
+    
+    Args:
+        job: Last job of the current page
+    
+    Returns:
+        str: URL-safe base64 of "requested_at|id"
+    """
+    key = f"{job['requested_at']}|{job['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Parse a get_job_history cursor back into its keyset
+    
+    Args:
+        cursor: Cursor from _encode_history_cursor
+    
+    Returns:
+        tuple: (requested_at, id)
+    
+    Raises:
+        ValueError: If cursor is malformed
+    """
+    try:
+        requested_at, job_uuid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        datetime.fromisoformat(requested_at)
+        uuid.UUID(job_uuid)
+    except ValueError:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+    return requested_at, job_uuid
+
+
+class JobNotFoundError(Exception):
+    """No job exists with the given job_id"""
+
+
+class JobStatusError(Exception):
+    """The job's current status doesn't allow the requested transition"""
+
 
 class JobRepository:
     """
@@ -21,7 +147,27 @@ class JobRepository:
     
     TABLE_NAME = "scraper_jobs"
     
-    def __init__(self, db_client: Optional[Client] = None):
+    # Projection for list views: everything JobResponse shows except error_message, which
+    # can hold a full traceback. get_job_by_id still selects "*".
+    LIST_COLUMNS = (
+        "id,job_id,scraper_name,scraper_type,status,created_by,requested_at,approved_at,"
+        "started_at,completed_at,container_id,records_processed,updated_at"
+    )
+    
+    # job_ids per get_jobs_by_ids query, keeping the in.(...) filter well under URL length limits
+    IDS_PER_QUERY = 200
+    
+    # Statuses a job never leaves; get_job_history lists these when no status filter is given
+    TERMINAL_STATUSES = (
+        JobStatus.COMPLETED.value,
+        JobStatus.FAILED.value,
+        JobStatus.CANCELLED.value
+    )
+    
+    # Seconds cached job statistics are served before being refreshed
+    STATS_CACHE_TTL = 10.0
+    
+    def __init__(self, db_client: Optional["Client"] = None):
         """
         Initialize job repository
         
@@ -29,6 +175,11 @@ class JobRepository:
             db_client: Supabase client instance (optional, will use default if not provided)
         """
         self.db = db_client or get_db()
+        
+        # (monotonic timestamp, stats) of the last statistics query
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._stats_lock = threading.Lock()
+        self._stats_refreshing = False
     
     def create_job(self, job_data: JobCreate) -> Dict[str, Any]:
         """
@@ -56,6 +207,7 @@ class JobRepository:
             
             if response.data and len(response.data) > 0:
                 logger.info(f"✅ Job created: {job_data.job_id}")
+                self.invalidate_job_statistics()
                 return response.data[0]
             else:
                 raise Exception("No data returned from insert operation")
@@ -95,50 +247,84 @@ class JobRepository:
             logger.error(f"❌ Failed to get job {job_id}: {e}")
             raise
     
-    def update_job(self, job_id: str, update_data: JobUpdate) -> Dict[str, Any]:
+    def get_jobs_by_ids(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several jobs by job_id with one query per IDS_PER_QUERY ids
+        
+        Args:
+            job_ids: Unique job identifiers
+        
+        Returns:
+            Dict: job_id -> job record (LIST_COLUMNS plus duration_seconds); ids that
+                don't exist are missing from the result
+        """
+        unique_ids = list(dict.fromkeys(job_ids))
+        jobs: Dict[str, Dict[str, Any]] = {}
+        try:
+            for start in range(0, len(unique_ids), self.IDS_PER_QUERY):
+                response = self.db.table(self.TABLE_NAME)\
+                    .select(self.LIST_COLUMNS)\
+                    .in_("job_id", unique_ids[start:start + self.IDS_PER_QUERY])\
+                    .execute()
+                
+                for job in response.data or []:
+                    job['duration_seconds'] = calculate_duration(
+                        job.get('started_at'),
+                        job.get('completed_at')
+                    )
+                    jobs[job['job_id']] = job
+            
+            return jobs
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to get {len(unique_ids)} jobs by id: {e}")
+            raise
+    
+    def update_job(
+        self,
+        job_id: str,
+        update_data: JobUpdate,
+        expected_statuses: Optional[List[JobStatus]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Update a job's fields
         
         Args:
             job_id: Unique job identifier
             update_data: Fields to update
+            expected_statuses: Only update if the job currently has one of these statuses
+                (checked atomically by the UPDATE itself)
         
         Returns:
-            Dict: Updated job record
+            Dict: Updated job record, or None if expected_statuses was given and the job
+            doesn't exist or isn't in one of them
         
         Raises:
+            ValueError: If update_data sets no fields
             Exception: If update fails
         """
+        # Build update dict with only non-None values (mode="json" gives ISO datetimes)
+        data = update_data.model_dump(exclude_none=True, mode="json")
+        if not data:
+            # A no-op update is a caller bug - don't spend a round trip re-reading the job
+            raise ValueError(f"No fields to update for job {job_id}")
+        
         try:
-            # Build update dict with only non-None values
-            data = {}
-            if update_data.status is not None:
-                data["status"] = update_data.status
-            if update_data.approved_at is not None:
-                data["approved_at"] = update_data.approved_at.isoformat()
-            if update_data.started_at is not None:
-                data["started_at"] = update_data.started_at.isoformat()
-            if update_data.completed_at is not None:
-                data["completed_at"] = update_data.completed_at.isoformat()
-            if update_data.container_id is not None:
-                data["container_id"] = update_data.container_id
-            if update_data.error_message is not None:
-                data["error_message"] = update_data.error_message
-            if update_data.records_processed is not None:
-                data["records_processed"] = update_data.records_processed
-            
-            if not data:
-                logger.warning(f"No fields to update for job {job_id}")
-                return self.get_job_by_id(job_id)
-            
-            response = self.db.table(self.TABLE_NAME)\
+            query = self.db.table(self.TABLE_NAME)\
                 .update(data)\
-                .eq("job_id", job_id)\
-                .execute()
+                .eq("job_id", job_id)
+            if expected_statuses:
+                query = query.in_("status", [
+                    s.value if isinstance(s, JobStatus) else s for s in expected_statuses
+                ])
+            response = query.execute()
             
             if response.data and len(response.data) > 0:
                 logger.info(f"✅ Job updated: {job_id}")
+                self.invalidate_job_statistics()
                 return response.data[0]
+            elif expected_statuses:
+                return None
             else:
                 raise Exception(f"Job not found or update failed: {job_id}")
                 
@@ -150,35 +336,45 @@ class JobRepository:
         self,
         job_id: str,
         status: JobStatus,
+        expected_statuses: Optional[List[JobStatus]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> Optional[Dict[str, Any]]:
         """
         Update job status and optionally other fields
         
         Args:
             job_id: Unique job identifier
             status: New job status
+            expected_statuses: Only update if the job currently has one of these statuses
             **kwargs: Additional fields to update (container_id, error_message, etc.)
         
         Returns:
-            Dict: Updated job record
+            Dict: Updated job record (None if expected_statuses didn't match)
         """
-        update_data = JobUpdate(status=status)
+        global _status_timestamps_trigger_available
+        
+        # Additional fields from kwargs (anything JobUpdate doesn't know is ignored)
+        update_data = JobUpdate(
+            status=status,
+            **{key: value for key, value in kwargs.items() if key in JobUpdate.model_fields}
+        )
         
-        # Set timestamp based on status
-        if status == JobStatus.APPROVED:
-            update_data.approved_at = datetime.utcnow()
-        elif status == JobStatus.RUNNING:
-            update_data.started_at = datetime.utcnow()
-        elif status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
-            update_data.completed_at = datetime.utcnow()
+        # Timestamp for the new status: stamped by the trigger (see STATUS_TIMESTAMPS_TRIGGER_SQL)
+        status_value = status.value if isinstance(status, JobStatus) else status
+        timestamp_column = STATUS_TIMESTAMP_COLUMNS.get(status_value)
+        if timestamp_column and not _status_timestamps_trigger_available:
+            setattr(update_data, timestamp_column, datetime.now(timezone.utc))
         
-        # Add any additional fields from kwargs
-        for key, value in kwargs.items():
-            if hasattr(update_data, key):
-                setattr(update_data, key, value)
+        job = self.update_job(job_id, update_data, expected_statuses=expected_statuses)
         
-        return self.update_job(job_id, update_data)
+        if job and timestamp_column and _status_timestamps_trigger_available and job.get(timestamp_column) is None:
+            logger.warning(f"⚠️ set_status_timestamps trigger missing - setting {timestamp_column} from Python")
+            _status_timestamps_trigger_available = False
+            job = self.update_job(
+                job_id, JobUpdate(**{timestamp_column: datetime.now(timezone.utc)})
+            )
+        
+        return job
     
     def get_pending_jobs(self) -> List[Dict[str, Any]]:
         """
@@ -187,31 +383,7 @@ class JobRepository:
         Returns:
             List[Dict]: List of pending jobs
         """
-        try:
-            logger.info(f"🔍 Querying table '{self.TABLE_NAME}' for status: '{JobStatus.PENDING}' (value: '{JobStatus.PENDING.value}')")
-            
-            response = self.db.table(self.TABLE_NAME)\
-                .select("*")\
-                .eq("status", JobStatus.PENDING.value)\
-                .order("requested_at", desc=True)\
-                .execute()
-            
-            logger.info(f"📊 Supabase response: {response}")
-            logger.info(f"📊 Response data: {response.data}")
-            logger.info(f"📊 Response count: {response.count if hasattr(response, 'count') else 'N/A'}")
-            
-            jobs = response.data or []
-            logger.info(f"📋 Found {len(jobs)} pending jobs")
-            
-            if jobs:
-                logger.info(f"📝 Sample job: {jobs[0]}")
-            
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to get pending jobs: {e}")
-            logger.exception("Full traceback:")
-            raise
+        return self.get_jobs_by_status(JobStatus.PENDING)
     
     def get_running_jobs(self) -> List[Dict[str, Any]]:
         """
@@ -220,77 +392,105 @@ class JobRepository:
         Returns:
             List[Dict]: List of running jobs
         """
-        try:
-            response = self.db.table(self.TABLE_NAME)\
-                .select("*")\
-                .eq("status", JobStatus.RUNNING.value)\
-                .order("started_at", desc=True)\
-                .execute()
-            
-            jobs = response.data or []
-            logger.info(f"🔄 Found {len(jobs)} running jobs")
-            return jobs
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to get running jobs: {e}")
-            raise
+        return self.get_jobs_by_status(JobStatus.RUNNING, order_by="started_at")
     
     def get_job_history(
         self,
         page: int = 1,
         limit: int = 20,
         scraper_name: Optional[str] = None,
-        status: Optional[JobStatus] = None
-    ) -> tuple[List[Dict[str, Any]], int]:
+        status: Optional[JobStatus] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
         """
         Get job history with pagination and filtering
         
+        Pass the returned next_cursor back as cursor to fetch the following page by keyset
+        (requested_at, id), which stays O(limit) however deep the page; page is then ignored.
+        
         Args:
-            page: Page number (1-indexed)
+            page: Page number (1-indexed), used when no cursor is given
             limit: Items per page
             scraper_name: Filter by scraper name (optional)
             status: Filter by status (optional)
+            cursor: next_cursor from the previous page (optional)
         
         Returns:
-            tuple: (list of jobs, total count)
+            tuple: (list of jobs, total count, cursor for the next page or None)
+        
+        Raises:
+            ValueError: If cursor is malformed
         """
+        global _duration_field_available
+        keyset = _decode_history_cursor(cursor) if cursor else None
+        status_value = status.value if isinstance(status, JobStatus) else status
         try:
-            # Build query
-            query = self.db.table(self.TABLE_NAME).select("*", count="exact")
-            
-            # Apply filters
-            if scraper_name:
-                query = query.eq("scraper_name", scraper_name)
-            
-            if status:
-                query = query.eq("status", status.value if isinstance(status, JobStatus) else status)
-            else:
-                # By default, show completed, failed, and cancelled jobs
-                query = query.in_("status", [
-                    JobStatus.COMPLETED.value,
-                    JobStatus.FAILED.value,
-                    JobStatus.CANCELLED.value
-                ])
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            query = query.order("requested_at", desc=True)\
-                .range(offset, offset + limit - 1)
+            # With no scraper filter the total comes from the cached statistics instead of
+            # a count="exact" over the whole filtered set on every page
+            total = None
+            if not scraper_name:
+                stats = self.get_job_statistics()
+                total = stats.get(status_value, 0) if status_value else sum(
+                    stats[value] for value in self.TERMINAL_STATUSES
+                )
             
-            response = query.execute()
+            def build_query(columns: str):
+                # Build query
+                query = self.db.table(self.TABLE_NAME).select(
+                    columns, count="exact" if total is None else None
+                )
+                
+                # Apply filters
+                if scraper_name:
+                    query = query.eq("scraper_name", scraper_name)
+                
+                if status_value:
+                    query = query.eq("status", status_value)
+                else:
+                    # By default, show completed, failed, and cancelled jobs
+                    query = query.in_("status", self.TERMINAL_STATUSES)
+                
+                # id breaks ties between jobs requested at the same instant
+                query = query.order("requested_at", desc=True).order("id", desc=True)
+                
+                # Apply pagination
+                if keyset:
+                    requested_at, job_uuid = keyset
+                    return query.or_(
+                        f'requested_at.lt."{requested_at}",'
+                        f'and(requested_at.eq."{requested_at}",id.lt.{job_uuid})'
+                    ).limit(limit)
+                offset = (page - 1) * limit
+                return query.range(offset, offset + limit - 1)
+            
+            response = None
+            if _duration_field_available:
+                # duration_seconds computed by Postgres (see DURATION_FIELD_SQL)
+                try:
+                    response = build_query(f"{self.LIST_COLUMNS},duration_seconds").execute()
+                except Exception as e:
+                    if not _is_missing_from_schema(e, MISSING_COLUMN_CODES):
+                        raise
+                    logger.warning(f"⚠️ duration_seconds computed field unavailable - computing in Python: {e}")
+                    _duration_field_available = False
+            
+            if response is None:
+                response = build_query(self.LIST_COLUMNS).execute()
+                
+                # Add computed duration for each job
+                for job in response.data or []:
+                    job['duration_seconds'] = calculate_duration(
+                        job.get('started_at'),
+                        job.get('completed_at')
+                    )
             
             jobs = response.data or []
-            total = response.count or 0
-            
-            # Add computed duration for each job
-            for job in jobs:
-                job['duration_seconds'] = calculate_duration(
-                    job.get('started_at'),
-                    job.get('completed_at')
-                )
+            if total is None:
+                total = response.count or 0
+            next_cursor = _encode_history_cursor(jobs[-1]) if len(jobs) == limit else None
             
-            logger.info(f"📊 Retrieved {len(jobs)} jobs (page {page}, total {total})")
-            return jobs, total
+            logger.info(f"📊 Retrieved {len(jobs)} jobs (page {'cursor' if keyset else page}, total {total})")
+            return jobs, total, next_cursor
             
         except Exception as e:
             logger.error(f"❌ Failed to get job history: {e}")
@@ -307,19 +507,22 @@ class JobRepository:
             Dict: Updated job record
         
         Raises:
-            Exception: If job is not in pending status
+            JobNotFoundError: If the job doesn't exist
+            JobStatusError: If job is not in pending status (e.g. another request approved it first)
         """
         try:
-            # First, check if job exists and is pending
+            # Update to approved status only if the job is still pending (one atomic UPDATE)
+            job = self.update_job_status(
+                job_id, JobStatus.APPROVED, expected_statuses=[JobStatus.PENDING]
+            )
+            if job:
+                return job
+            
+            # Nothing updated - look the job up once to report why
             job = self.get_job_by_id(job_id)
             if not job:
-                raise Exception(f"Job not found: {job_id}")
-            
-            if job['status'] != JobStatus.PENDING:
-                raise Exception(f"Job is not in pending status: {job['status']}")
-            
-            # Update to approved status
-            return self.update_job_status(job_id, JobStatus.APPROVED)
+                raise JobNotFoundError(f"Job not found: {job_id}")
+            raise JobStatusError(f"Job is not in pending status. Current status: {job['status']}")
             
         except Exception as e:
             logger.error(f"❌ Failed to approve job {job_id}: {e}")
@@ -337,26 +540,30 @@ class JobRepository:
             Dict: Updated job record
         
         Raises:
-            Exception: If job cannot be cancelled
+            JobNotFoundError: If the job doesn't exist
+            JobStatusError: If job is neither pending nor running
         """
         try:
-            # Check if job exists
-            job = self.get_job_by_id(job_id)
-            if not job:
-                raise Exception(f"Job not found: {job_id}")
-            
-            current_status = job['status']
-            
-            # Can only cancel pending or running jobs
-            if current_status not in [JobStatus.PENDING, JobStatus.RUNNING]:
-                raise Exception(f"Cannot cancel job with status: {current_status}")
-            
             # Update to cancelled status
             kwargs = {}
             if reason:
                 kwargs['error_message'] = f"Cancelled: {reason}"
             
-            return self.update_job_status(job_id, JobStatus.CANCELLED, **kwargs)
+            # Can only cancel pending or running jobs (checked atomically by the UPDATE)
+            job = self.update_job_status(
+                job_id,
+                JobStatus.CANCELLED,
+                expected_statuses=[JobStatus.PENDING, JobStatus.RUNNING],
+                **kwargs
+            )
+            if job:
+                return job
+            
+            # Nothing updated - look the job up once to report why
+            job = self.get_job_by_id(job_id)
+            if not job:
+                raise JobNotFoundError(f"Job not found: {job_id}")
+            raise JobStatusError(f"Cannot cancel job with status: {job['status']}")
             
         except Exception as e:
             logger.error(f"❌ Failed to cancel job {job_id}: {e}")
@@ -379,31 +586,38 @@ class JobRepository:
                 .execute()
             
             logger.warning(f"🗑️ Job deleted: {job_id}")
+            self.invalidate_job_statistics()
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to delete job {job_id}: {e}")
             raise
     
-    def get_jobs_by_status(self, status: JobStatus) -> List[Dict[str, Any]]:
+    def get_jobs_by_status(self, status: JobStatus, order_by: str = "requested_at") -> List[Dict[str, Any]]:
         """
-        Get all jobs with a specific status
+        Get all jobs with a specific status, newest first
         
         Args:
             status: Job status to filter by
+            order_by: Timestamp column to sort by (descending)
         
         Returns:
             List[Dict]: List of jobs with the specified status
         """
         try:
             response = self.db.table(self.TABLE_NAME)\
-                .select("*")\
+                .select(self.LIST_COLUMNS)\
                 .eq("status", status.value if isinstance(status, JobStatus) else status)\
-                .order("requested_at", desc=True)\
+                .order(order_by, desc=True)\
                 .execute()
             
             jobs = response.data or []
             logger.info(f"📋 Found {len(jobs)} jobs with status: {status}")
+            
+            # The scheduler polls pending jobs constantly - only pay for the repr when debugging
+            if jobs and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📝 Sample job: %s", jobs[0])
+            
             return jobs
             
         except Exception as e:
@@ -423,7 +637,7 @@ class JobRepository:
         """
         try:
             response = self.db.table(self.TABLE_NAME)\
-                .select("*")\
+                .select(self.LIST_COLUMNS)\
                 .eq("scraper_name", scraper_name)\
                 .order("requested_at", desc=True)\
                 .limit(limit)\
@@ -437,10 +651,87 @@ class JobRepository:
             logger.error(f"❌ Failed to get jobs for scraper {scraper_name}: {e}")
             raise
     
+    def _status_counts_via_rpc(self) -> Optional[Dict[str, int]]:
+        """
+        Job counts per status from the get_job_status_counts rpc (see STATUS_COUNTS_RPC_SQL)
+        
+        Returns:
+            Dict: status -> count, or None if the rpc is unavailable
+        """
+        global _status_counts_rpc_available
+        if not _status_counts_rpc_available:
+            return None
+        
+        try:
+            response = self.db.rpc(STATUS_COUNTS_RPC).execute()
+            return {row["status"]: int(row["cnt"]) for row in response.data or []}
+        except Exception as e:
+            if _is_missing_from_schema(e, MISSING_FUNCTION_CODES):
+                logger.warning(f"⚠️ {STATUS_COUNTS_RPC} rpc not installed - counting per status: {e}")
+                _status_counts_rpc_available = False
+            else:
+                logger.warning(f"⚠️ {STATUS_COUNTS_RPC} rpc failed - counting per status this time: {e}")
+            return None
+    
     def get_job_statistics(self) -> Dict[str, Any]:
         """
         Get job statistics (counts by status)
         
+        Served from cache for STATS_CACHE_TTL seconds; a stale entry is returned
+        immediately while a background thread refreshes it (stale-while-revalidate)
+        
+        Returns:
+            Dict: Statistics with counts for each status
+        """
+        cached = self._stats_cache
+        if cached is None:
+            return dict(self._refresh_job_statistics())
+        
+        cached_at, stats = cached
+        if time.monotonic() - cached_at >= self.STATS_CACHE_TTL:
+            with self._stats_lock:
+                start_refresh = not self._stats_refreshing
+                self._stats_refreshing = True
+            if start_refresh:
+                threading.Thread(target=self._refresh_job_statistics_quietly, daemon=True).start()
+        return dict(stats)
+    
+    def invalidate_job_statistics(self):
+        """
+        Mark cached statistics stale so the next call refreshes them
+        """
+        cached = self._stats_cache
+        if cached is not None:
+            self._stats_cache = (0.0, cached[1])
+    
+    def _refresh_job_statistics(self) -> Dict[str, Any]:
+        """
+        Recompute job statistics and store them in the cache
+        
+        Returns:
+            Dict: Statistics with counts for each status
+        """
+        try:
+            stats = self._compute_job_statistics()
+            self._stats_cache = (time.monotonic(), stats)
+            return stats
+        finally:
+            with self._stats_lock:
+                self._stats_refreshing = False
+    
+    def _refresh_job_statistics_quietly(self):
+        """
+        Background refresh: keep serving the stale entry if the refresh fails
+        """
+        try:
+            self._refresh_job_statistics()
+        except Exception:
+            pass  # already logged by _compute_job_statistics
+    
+    def _compute_job_statistics(self) -> Dict[str, Any]:
+        """
+        Query job counts by status from the database
+        
         Returns:
             Dict: Statistics with counts for each status
         """
@@ -455,19 +746,27 @@ class JobRepository:
                 "cancelled": 0
             }
             
-            # Get total count
-            response = self.db.table(self.TABLE_NAME)\
-                .select("*", count="exact")\
-                .execute()
-            stats["total"] = response.count or 0
-            
-            # Get counts by status
-            for status in JobStatus:
+            status_counts = self._status_counts_via_rpc()
+            if status_counts is not None:
+                # One grouped query: total is the sum over every status present
+                for status, count in status_counts.items():
+                    if status in stats and status != "total":
+                        stats[status] = count
+                stats["total"] = sum(status_counts.values())
+            else:
+                # Get total count (head=True: only the count comes back, not the rows)
                 response = self.db.table(self.TABLE_NAME)\
-                    .select("*", count="exact")\
-                    .eq("status", status.value)\
+                    .select("id", count="exact", head=True)\
                     .execute()
-                stats[status.value] = response.count or 0
+                stats["total"] = response.count or 0
+                
+                # Get counts by status
+                for status in JobStatus:
+                    response = self.db.table(self.TABLE_NAME)\
+                        .select("id", count="exact", head=True)\
+                        .eq("status", status.value)\
+                        .execute()
+                    stats[status.value] = response.count or 0
             
             logger.info(f"📊 Job statistics: {stats}")
             return stats
@@ -477,8 +776,114 @@ class JobRepository:
             raise
 
 
-# Global repository instance
-job_repository = JobRepository()
+class AsyncJobRepository:
+    """
+    Awaitable facade over JobRepository for async request handlers
+    
+    Every call runs the synchronous repository method in a worker thread (the same approach
+    as the /health probe), so a slow Supabase round trip no longer blocks the event loop.
+    Wrapping one shared JobRepository keeps its statistics cache and rpc fallbacks.
+    """
+    
+    def __init__(self, repository: Optional[JobRepository] = None):
+        """
+        Initialize async job repository
+        
+        Args:
+            repository: Synchronous repository to wrap (optional, will use default if not provided)
+        """
+        self.sync = repository or get_job_repository()
+    
+    async def create_job(self, job_data: JobCreate) -> Dict[str, Any]:
+        """Async JobRepository.create_job"""
+        return await asyncio.to_thread(self.sync.create_job, job_data)
+    
+    async def get_job_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Async JobRepository.get_job_by_id"""
+        return await asyncio.to_thread(self.sync.get_job_by_id, job_id)
+    
+    async def get_jobs_by_ids(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async JobRepository.get_jobs_by_ids"""
+        return await asyncio.to_thread(self.sync.get_jobs_by_ids, job_ids)
+    
+    async def update_job(
+        self,
+        job_id: str,
+        update_data: JobUpdate,
+        expected_statuses: Optional[List[JobStatus]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Async JobRepository.update_job"""
+        return await asyncio.to_thread(
+            self.sync.update_job, job_id, update_data, expected_statuses=expected_statuses
+        )
+    
+    async def update_job_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        expected_statuses: Optional[List[JobStatus]] = None,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """Async JobRepository.update_job_status"""
+        return await asyncio.to_thread(
+            self.sync.update_job_status, job_id, status, expected_statuses=expected_statuses, **kwargs
+        )
+    
+    async def get_pending_jobs(self) -> List[Dict[str, Any]]:
+        """Async JobRepository.get_pending_jobs"""
+        return await asyncio.to_thread(self.sync.get_pending_jobs)
+    
+    async def get_running_jobs(self) -> List[Dict[str, Any]]:
+        """Async JobRepository.get_running_jobs"""
+        return await asyncio.to_thread(self.sync.get_running_jobs)
+    
+    async def get_job_history(
+        self,
+        page: int = 1,
+        limit: int = 20,
+        scraper_name: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+        """Async JobRepository.get_job_history"""
+        return await asyncio.to_thread(
+            self.sync.get_job_history,
+            page=page,
+            limit=limit,
+            scraper_name=scraper_name,
+            status=status,
+            cursor=cursor
+        )
+    
+    async def approve_job(self, job_id: str) -> Dict[str, Any]:
+        """Async JobRepository.approve_job"""
+        return await asyncio.to_thread(self.sync.approve_job, job_id)
+    
+    async def cancel_job(self, job_id: str, reason: Optional[str] = None) -> Dict[str, Any]:
+        """Async JobRepository.cancel_job"""
+        return await asyncio.to_thread(self.sync.cancel_job, job_id, reason)
+    
+    async def delete_job(self, job_id: str) -> bool:
+        """Async JobRepository.delete_job"""
+        return await asyncio.to_thread(self.sync.delete_job, job_id)
+    
+    async def get_jobs_by_status(self, status: JobStatus, order_by: str = "requested_at") -> List[Dict[str, Any]]:
+        """Async JobRepository.get_jobs_by_status"""
+        return await asyncio.to_thread(self.sync.get_jobs_by_status, status, order_by)
+    
+    async def get_jobs_by_scraper(self, scraper_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Async JobRepository.get_jobs_by_scraper"""
+        return await asyncio.to_thread(self.sync.get_jobs_by_scraper, scraper_name, limit)
+    
+    async def get_job_statistics(self) -> Dict[str, Any]:
+        """Async JobRepository.get_job_statistics"""
+        return await asyncio.to_thread(self.sync.get_job_statistics)
+
+
+# Global repository instance, created on first use so importing this module doesn't
+# open a Supabase client
+_job_repository: Optional[JobRepository] = None
+_job_repository_lock = threading.Lock()
 
 
 def get_job_repository() -> JobRepository:
@@ -488,5 +893,28 @@ def get_job_repository() -> JobRepository:
     Returns:
         JobRepository: Job repository instance
     """
-    return job_repository
+    global _job_repository
+    if _job_repository is None:
+        with _job_repository_lock:
+            if _job_repository is None:
+                _job_repository = JobRepository()
+    return _job_repository
+
 
+_async_job_repository: Optional[AsyncJobRepository] = None
+
+
+def get_async_job_repository() -> AsyncJobRepository:
+    """
+    Dependency function to get the async job repository for async request handlers
+    
+    Returns:
+        AsyncJobRepository: Async facade over the shared job repository
+    """
+    global _async_job_repository
+    if _async_job_repository is None:
+        repository = get_job_repository()
+        with _job_repository_lock:
+            if _async_job_repository is None:
+                _async_job_repository = AsyncJobRepository(repository)
+    return _async_job_repository
@@ -2,40 +2,260 @@
 Docker Service - Wrapper for Docker API operations
 """
 
-import docker
-from docker.models.containers import Container
-from docker.errors import DockerException, NotFound, APIError
+from __future__ import annotations
+
+import asyncio
+import functools
 import logging
-from typing import Optional, Dict, Any
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, Optional, TypeVar
 from pathlib import Path
+from urllib.parse import urlparse
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    import docker
+    from docker.models.containers import Container
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _docker():
+    """
+    The docker SDK module, imported on first use
+    
+    docker (and requests under it) is imported lazily rather than with this module, so
+    importing the app doesn't pay for it.
+    """
+    import docker
+    return docker
+
 
 class DockerService:
     """
     Service for managing Docker containers for scraper execution
+    
+    docker-py is blocking, so async code runs these methods through run_blocking(), on this
+    service's own threads, which keeps them off the default executor that asyncio.to_thread
+    (job repository, health probe) depends on. Calls that block for as long as a container
+    runs (wait_for_container) go through run_in_own_thread() instead, so short calls -
+    stop, cleanup, logs, the next create - never queue behind them.
     """
     
+    # Executor threads for short daemon calls
+    EXECUTOR_WORKERS = 8
+    # Items read ahead by stream_in_own_thread() before the reader thread waits for the consumer
+    STREAM_QUEUE_SIZE = 256
+    
+    # A tcp:// DOCKER_HOST on one of these hosts is the local daemon, reached via its socket
+    LOCAL_SOCKET_PATH = "/var/run/docker.sock"
+    LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+    
     def __init__(self):
         """Initialize Docker client"""
+        docker = _docker()
+        
+        # A pooled connection per executor thread plus one per concurrent job's wait
+        pool_size = self.EXECUTOR_WORKERS + settings.MAX_CONCURRENT_JOBS
+        
         try:
-            # Connect to Docker daemon
-            if settings.DOCKER_HOST:
-                self.client = docker.DockerClient(base_url=settings.DOCKER_HOST)
+            # Connect to Docker daemon - one long-lived client with a connection pool
+            docker_host = self._resolve_docker_host(settings.DOCKER_HOST)
+            if docker_host:
+                self.client = docker.DockerClient(base_url=docker_host, max_pool_size=pool_size)
             else:
                 # Use default socket (unix:///var/run/docker.sock)
-                self.client = docker.from_env()
+                self.client = docker.from_env(max_pool_size=pool_size)
             
             # Test connection
             self.client.ping()
             logger.info("✅ Docker client connected successfully")
             
-        except DockerException as e:
+        except docker.errors.DockerException as e:
             logger.error(f"❌ Failed to connect to Docker: {e}")
             raise
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.EXECUTOR_WORKERS, thread_name_prefix="docker")
+        
+        # Background image check/pull started by start_image_prepull()
+        self._image_ready: Optional[Future] = None
+    
+    def start_image_prepull(self):
+        """
+        Start making sure the scraper image is present, on the Docker executor
+        
+        Returns immediately, so a multi-hundred-MB pull doesn't hold up application
+        startup; create_and_run_container waits for it instead. No-op unless
+        DOCKER_PREPULL_ON_START is set, or if already started.
+        """
+        if settings.DOCKER_PREPULL_ON_START and self._image_ready is None:
+            self._image_ready = self._executor.submit(self._ensure_image, settings.DOCKER_IMAGE_NAME)
+    
+    def _ensure_image(self, image_name: str):
+        """
+        Pull the scraper image if the daemon doesn't have it
+        
+        containers.run() would otherwise pull it on the first job's critical path. A failed
+        pull (e.g. a locally built image that isn't in any registry) is only logged - the
+        first job then fails with the same error it always did.
+        
+        Args:
+            image_name: Image to check (DOCKER_IMAGE_NAME)
+        """
+        try:
+            self.client.images.get(image_name)
+            logger.info(f"🐳 Image {image_name} is present")
+        except _docker().errors.ImageNotFound:
+            logger.info(f"⬇️ Image {image_name} not found locally - pulling")
+            try:
+                self.client.images.pull(image_name)
+                logger.info(f"✅ Pulled image {image_name}")
+            except _docker().errors.DockerException as e:
+                logger.warning(f"⚠️ Could not pull image {image_name}: {e}")
+        except _docker().errors.DockerException as e:
+            logger.warning(f"⚠️ Could not check image {image_name}: {e}")
+    
+    def _resolve_docker_host(self, docker_host: Optional[str]) -> Optional[str]:
+        """
+        Prefer the local Unix socket over TCP for a daemon on this machine
+        
+        Args:
+            docker_host: Configured DOCKER_HOST (None = docker default)
+        
+        Returns:
+            str: Base URL to connect to (None = docker default)
+        """
+        if not docker_host or settings.FORCE_TCP_DOCKER:
+            return docker_host
+        
+        url = urlparse(docker_host)
+        if url.scheme == "tcp" and url.hostname in self.LOCAL_HOSTS and os.path.exists(self.LOCAL_SOCKET_PATH):
+            socket_url = f"unix://{self.LOCAL_SOCKET_PATH}"
+            logger.info(f"🔌 DOCKER_HOST {docker_host} is local - using {socket_url} instead (set FORCE_TCP_DOCKER to keep TCP)")
+            return socket_url
+        return docker_host
+    
+    async def run_blocking(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking Docker call on the Docker executor without blocking the event loop
+        
+        Args:
+            func: Callable to run (usually a method of this service)
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            The return value of func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def run_in_own_thread(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a Docker call that blocks for a long time on a thread of its own
+        
+        For wait_for_container: nothing caps how many jobs run at once, so waits on the
+        executor could take every thread for up to JOB_TIMEOUT_SECONDS. Cancelling the
+        await (e.g. asyncio.wait_for timing out) leaves the thread blocked until the call
+        returns - stopping the container releases it.
+        
+        Args:
+            func: Callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            The return value of func
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def deliver(result=None, error=None):
+            if future.done():
+                return  # awaiting side gave up
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        
+        def target():
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                callback = functools.partial(deliver, error=e)
+            else:
+                callback = functools.partial(deliver, result)
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                pass  # event loop already closed (shutdown)
+        
+        threading.Thread(target=target, name="docker-wait", daemon=True).start()
+        return await future
+    
+    async def stream_in_own_thread(self, iterable: Iterable[T]) -> AsyncIterator[T]:
+        """
+        Iterate a blocking stream (e.g. followed container logs) from a thread of its own
+        
+        A followed log stream blocks until the container writes its next line, which can
+        be minutes; read on a shared pool, a few idle viewers would hold every thread. The
+        reader thread hands items over through a bounded asyncio.Queue. When the consumer
+        stops early the stream is closed, which ends the thread.
+        
+        Args:
+            iterable: Blocking iterable to read
+        
+        Yields:
+            Items of iterable, in order (an exception raised by it is re-raised here)
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+        
+        def put(entry) -> bool:
+            if stopped.is_set():
+                return False
+            try:
+                # Blocks while the queue is full - the consumer sets the pace
+                asyncio.run_coroutine_threadsafe(queue.put(entry), loop).result()
+            except RuntimeError:
+                return False  # event loop already closed (shutdown)
+            return not stopped.is_set()
+        
+        def reader():
+            try:
+                for item in iterable:
+                    if not put(("item", item)):
+                        return
+                put(("end", None))
+            except BaseException as e:
+                put(("error", e))
+        
+        threading.Thread(target=reader, name="docker-stream", daemon=True).start()
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            stopped.set()
+            close = getattr(iterable, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    logger.debug(f"Error closing stream: {e}")
+            # Free a put() waiting on a full queue so the reader sees stopped
+            while not queue.empty():
+                queue.get_nowait()
     
     def create_and_run_container(
         self,
@@ -57,22 +277,15 @@ class DockerService:
         Raises:
             DockerException: If container creation fails
         """
+        # A job approved during startup waits for the pre-pull rather than starting a
+        # second pull of the same image (wait() doesn't raise; run() reports any failure)
+        if self._image_ready is not None:
+            wait([self._image_ready])
+        
         try:
             # Container name
             container_name = f"scraper-{job_id}"
             
-            # Check if container with same name exists and remove it
-            try:
-                existing_container = self.client.containers.get(container_name)
-                logger.warning(f"⚠️ Container {container_name} already exists. Removing it...")
-                existing_container.remove(force=True)
-                logger.info(f"✅ Removed existing container: {container_name}")
-            except NotFound:
-                # Container doesn't exist, which is fine
-                pass
-            except DockerException as e:
-                logger.warning(f"⚠️ Error checking/removing existing container: {e}")
-            
             # Prepare environment variables
             container_env = {
                 "SUPABASE_URL": settings.SUPABASE_URL,
@@ -90,8 +303,10 @@ class DockerService:
             logger.info(f"📦 Image: {settings.DOCKER_IMAGE_NAME}")
             logger.info(f"🔧 Command: {command}")
             
-            # Create and start container
-            container = self.client.containers.run(
+            # Create and start container. No existence probe first: a leftover container with
+            # the same name is rare and surfaces as a 409 conflict, handled by removing it and
+            # retrying once
+            run_kwargs = dict(
                 image=settings.DOCKER_IMAGE_NAME,
                 name=container_name,
                 command=command,
@@ -109,11 +324,20 @@ class DockerService:
                 # Auto-restart on failure (max 3 times)
                 restart_policy={"Name": "on-failure", "MaximumRetryCount": 3}
             )
+            try:
+                container = self.client.containers.run(**run_kwargs)
+            except _docker().errors.APIError as e:
+                if e.status_code != 409:
+                    raise
+                logger.warning(f"⚠️ Container {container_name} already exists. Removing it...")
+                self.client.containers.get(container_name).remove(force=True)
+                logger.info(f"✅ Removed existing container: {container_name}")
+                container = self.client.containers.run(**run_kwargs)
             
             logger.info(f"✅ Container created: {container.id[:12]}")
             return container
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"❌ Failed to create container: {e}")
             raise
     
@@ -129,10 +353,10 @@ class DockerService:
         """
         try:
             return self.client.containers.get(container_id)
-        except NotFound:
+        except _docker().errors.NotFound:
             logger.warning(f"Container not found: {container_id}")
             return None
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error getting container {container_id}: {e}")
             raise
     
@@ -146,11 +370,42 @@ class DockerService:
         Returns:
             str: Container status (running, exited, etc.) or None if not found
         """
-        container = self.get_container(container_id)
-        if container:
-            container.reload()  # Refresh container info
-            return container.status
-        return None
+        return self.get_statuses([container_id]).get(container_id)
+    
+    def get_statuses(self, container_ids: list[str]) -> Dict[str, str]:
+        """
+        Get the status of several containers with one list request
+        
+        Args:
+            container_ids: Container IDs (full or short)
+        
+        Returns:
+            dict: Container ID as given -> status (running, exited, etc.); containers that
+                don't exist are missing
+        """
+        if not container_ids:
+            return {}
+        
+        try:
+            # sparse=True keeps it to the one list call (otherwise docker-py inspects each
+            # container); the list response already carries the state
+            containers = self.client.containers.list(
+                all=True,
+                sparse=True,
+                filters={"id": list(container_ids)}
+            )
+        except _docker().errors.DockerException as e:
+            logger.error(f"Error getting status of {len(container_ids)} containers: {e}")
+            raise
+        
+        # The id filter matches prefixes, so map each requested ID to its container
+        statuses = {}
+        for container_id in container_ids:
+            for container in containers:
+                if container.id.startswith(container_id):
+                    statuses[container_id] = container.status
+                    break
+        return statuses
     
     def wait_for_container(self, container_id: str, timeout: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -179,7 +434,7 @@ class DockerService:
             
             return result
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error waiting for container {container_id}: {e}")
             raise
     
@@ -215,7 +470,7 @@ class DockerService:
                 tail=tail if tail else "all"
             )
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error getting logs for container {container_id}: {e}")
             raise
     
@@ -241,7 +496,7 @@ class DockerService:
             logger.info(f"✅ Container stopped: {container_id[:12]}")
             return True
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error stopping container {container_id}: {e}")
             raise
     
@@ -267,7 +522,7 @@ class DockerService:
             logger.info(f"✅ Container removed: {container_id[:12]}")
             return True
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error removing container {container_id}: {e}")
             raise
     
@@ -286,35 +541,49 @@ class DockerService:
             if not container:
                 return False
             
-            # Check if running
-            container.reload()
+            # Check if running - get_container just inspected it, so the status is current
             if container.status == "running":
                 self.stop_container(container_id)
             
             # Remove container
             return self.remove_container(container_id)
             
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error cleaning up container {container_id}: {e}")
             return False
     
-    def list_scraper_containers(self) -> list[Container]:
+    def list_scraper_containers(self) -> list[Dict[str, Any]]:
         """
-        List all scraper containers
+        List all scraper containers with their status
+        
+        One list request: the list response already carries each container's state, so
+        there is no per-container inspect. Use get_container(id) for a live Container.
         
         Returns:
-            list: List of scraper containers
+            list: {"id", "name", "status", "created"} per scraper container, created being
+                a Unix timestamp
         """
         try:
-            # Get all containers with name starting with "scraper-"
+            # Get all containers with name starting with "scraper-" - sparse=True skips the
+            # inspect docker-py otherwise makes for each one
             containers = self.client.containers.list(
                 all=True,
+                sparse=True,
                 filters={"name": "scraper-"}
             )
-            return containers
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error listing containers: {e}")
             raise
+        
+        return [
+            {
+                "id": container.id,
+                "name": (container.attrs.get("Names") or [""])[0].lstrip("/"),
+                "status": container.status,
+                "created": container.attrs.get("Created"),
+            }
+            for container in containers
+        ]
     
     def get_docker_info(self) -> Dict[str, Any]:
         """
@@ -325,13 +594,14 @@ class DockerService:
         """
         try:
             return self.client.info()
-        except DockerException as e:
+        except _docker().errors.DockerException as e:
             logger.error(f"Error getting Docker info: {e}")
             raise
     
     def close(self):
         """Close Docker client connection"""
         try:
+            self._executor.shutdown(wait=False, cancel_futures=True)
             self.client.close()
             logger.info("Docker client connection closed")
         except Exception as e:
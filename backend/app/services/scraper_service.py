@@ -4,39 +4,64 @@ Scraper Service - Orchestrates scraper job execution
 
 import asyncio
 import logging
+import re
 import subprocess
 import sys
-from typing import Optional
-from datetime import datetime
+import time
+from collections import deque
+from typing import Optional, Tuple
 from pathlib import Path
 
 from app.services.docker_service import get_docker_service, DockerService
-from app.repositories.job_repository import JobRepository, get_job_repository
+from app.repositories.job_repository import AsyncJobRepository, get_async_job_repository
 from app.api.models import JobStatus
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Record count in scraper logs, e.g. "Records processed: 1234" or "Prepared 1234 records for
+# database". Matched against raw log bytes; the number must be on the same line.
+_RECORDS_RE = re.compile(rb"(?:[Rr]ecords processed:|Prepared|records for database)[^\d\n]*(\d+)")
+
 
 class ScraperService:
     """
     Service for executing scraper jobs in Docker containers
     """
     
+    # Seconds a finished container is kept (so its logs stay available) before cleanup
+    SUCCESS_CLEANUP_DELAY = 60
+    FAILURE_CLEANUP_DELAY = 300
+    
+    # Log lines fetched after a successful container run to find the record count (the
+    # pipelines print it in their final summary)
+    RECORDS_LOG_TAIL = 200
+    
+    # Local runs: output lines kept for the failure message/log (memory stays bounded however
+    # long the scraper prints), and the longest line read before it is skipped
+    LOCAL_LOG_TAIL_LINES = 500
+    LOCAL_LINE_LIMIT = 1024 * 1024
+    
     def __init__(
         self,
         docker_service: Optional[DockerService] = None,
-        job_repository: Optional[JobRepository] = None
+        job_repository: Optional[AsyncJobRepository] = None
     ):
         """
         Initialize scraper service
         
         Args:
             docker_service: Docker service instance (optional)
-            job_repository: Job repository instance (optional)
+            job_repository: Async job repository instance (optional)
         """
         self.docker = docker_service or get_docker_service()
-        self.repo = job_repository or get_job_repository()
+        # Jobs run on the event loop, so database calls go through the async facade
+        self.repo = job_repository or get_async_job_repository()
+        
+        # (cleanup deadline, container id) served by one reaper task, so a finished job
+        # returns right away instead of sleeping until its container may be removed
+        self._cleanup_queue: "asyncio.PriorityQueue[Tuple[float, str]]" = asyncio.PriorityQueue()
+        self._reaper_task: Optional[asyncio.Task] = None
     
     async def execute_scraper_job(
         self,
@@ -77,10 +102,9 @@ class ScraperService:
             logger.info(f"🚀 Starting LOCAL execution for job {job_id} ({scraper_type})")
             
             # Update job status to running
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
-                JobStatus.RUNNING,
-                started_at=datetime.utcnow()
+                JobStatus.RUNNING
             )
             
             logger.info(f"🔄 Job {job_id} is now running locally")
@@ -93,36 +117,56 @@ class ScraperService:
                 sys.executable, "-m", module_path,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.STDOUT,
+                limit=self.LOCAL_LINE_LIMIT,
                 cwd=Path(__file__).parent.parent.parent  # backend directory
             )
             
+            # Read output line by line as it is produced: keep only the last lines and pick
+            # up the record count on the way, instead of buffering the whole output
+            log_tail: deque = deque(maxlen=self.LOCAL_LOG_TAIL_LINES)
+            records_processed = None
+            
+            async def read_output():
+                nonlocal records_processed
+                while True:
+                    try:
+                        line = await process.stdout.readline()
+                    except ValueError:
+                        continue  # line longer than LOCAL_LINE_LIMIT - skipped
+                    if not line:
+                        break
+                    log_tail.append(line)
+                    if records_processed is None:
+                        match = _RECORDS_RE.search(line)
+                        if match:
+                            records_processed = int(match.group(1))
+            
+            reader = asyncio.create_task(read_output())
+            
             # Wait for completion with timeout
             try:
-                stdout, _ = await asyncio.wait_for(
-                    process.communicate(),
+                exit_code = await asyncio.wait_for(
+                    process.wait(),
                     timeout=settings.JOB_TIMEOUT_SECONDS
                 )
-                exit_code = process.returncode
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
+                reader.cancel()
                 raise asyncio.TimeoutError(f"Job timed out after {settings.JOB_TIMEOUT_SECONDS} seconds")
+            await reader
             
-            logs_text = stdout.decode('utf-8') if stdout else ""
+            logs_text = b"".join(log_tail).decode('utf-8', errors='replace')
             
             if exit_code == 0:
                 # Success
                 logger.info(f"✅ Job {job_id} completed successfully")
                 
-                # Try to extract records processed from logs
-                records_processed = self._extract_records_from_logs(logs_text)
-                
                 # Update job status to completed
-                self.repo.update_job_status(
+                await self.repo.update_job_status(
                     job_id,
                     JobStatus.COMPLETED,
-                    records_processed=records_processed,
-                    completed_at=datetime.utcnow()
+                    records_processed=records_processed
                 )
                 
                 return True
@@ -131,11 +175,10 @@ class ScraperService:
                 logger.error(f"❌ Job {job_id} failed with exit code {exit_code}")
                 
                 # Update job status to failed
-                self.repo.update_job_status(
+                await self.repo.update_job_status(
                     job_id,
                     JobStatus.FAILED,
-                    error_message=f"Process exited with code {exit_code}. Logs:\n{logs_text[-500:]}",
-                    completed_at=datetime.utcnow()
+                    error_message=f"Process exited with code {exit_code}. Logs:\n{logs_text[-500:]}"
                 )
                 
                 logger.error(f"📋 Full error logs for job {job_id}:\n{logs_text}")
@@ -146,11 +189,10 @@ class ScraperService:
             logger.error(f"⏱️ Job {job_id} timed out after {settings.JOB_TIMEOUT_SECONDS} seconds")
             
             # Update job status to failed
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.FAILED,
-                error_message=f"Job timed out after {settings.JOB_TIMEOUT_SECONDS} seconds",
-                completed_at=datetime.utcnow()
+                error_message=f"Job timed out after {settings.JOB_TIMEOUT_SECONDS} seconds"
             )
             
             return False
@@ -160,11 +202,10 @@ class ScraperService:
             logger.exception("Full traceback:")
             
             # Update job status to failed
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.FAILED,
-                error_message=str(e),
-                completed_at=datetime.utcnow()
+                error_message=str(e)
             )
             
             return False
@@ -190,27 +231,28 @@ class ScraperService:
             logger.info(f"🚀 Starting DOCKER execution for job {job_id} ({scraper_type})")
             
             # Create and start Docker container
-            container = self.docker.create_and_run_container(
+            container = await self.docker.run_blocking(
+                self.docker.create_and_run_container,
                 scraper_type=scraper_type,
                 job_id=job_id
             )
             
             # Update job status to running with container ID
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.RUNNING,
-                container_id=container.id,
-                started_at=datetime.utcnow()
+                container_id=container.id
             )
             
             logger.info(f"🔄 Job {job_id} is now running in container {container.id[:12]}")
             
-            # Wait for container to complete (with timeout)
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.docker.wait_for_container,
-                container.id,
-                settings.JOB_TIMEOUT_SECONDS
+            # Wait for container to complete (with timeout). Timed out here rather than by
+            # docker-py so asyncio.TimeoutError below fires; stopping the container then
+            # releases the waiting thread. The wait gets a thread of its own, so the stop
+            # and cleanup calls never queue behind other jobs' waits.
+            result = await asyncio.wait_for(
+                self.docker.run_in_own_thread(self.docker.wait_for_container, container.id),
+                timeout=settings.JOB_TIMEOUT_SECONDS
             )
             
             # Check exit code
@@ -220,24 +262,23 @@ class ScraperService:
                 # Success
                 logger.info(f"✅ Job {job_id} completed successfully")
                 
-                # Get logs to extract records processed (if available)
-                logs = self.docker.get_container_logs(container.id, stream=False)
-                logs_text = logs.decode('utf-8') if isinstance(logs, bytes) else str(logs)
+                # Get the end of the logs to extract records processed (if available)
+                logs = await self.docker.run_blocking(
+                    self.docker.get_container_logs, container.id, stream=False, tail=self.RECORDS_LOG_TAIL
+                )
                 
                 # Try to extract records processed from logs
-                records_processed = self._extract_records_from_logs(logs_text)
+                records_processed = self._extract_records_from_logs(logs)
                 
                 # Update job status to completed
-                self.repo.update_job_status(
+                await self.repo.update_job_status(
                     job_id,
                     JobStatus.COMPLETED,
-                    records_processed=records_processed,
-                    completed_at=datetime.utcnow()
+                    records_processed=records_processed
                 )
                 
                 # Cleanup container after a delay (keep logs available for a bit)
-                await asyncio.sleep(60)  # Keep container for 1 minute
-                self.docker.cleanup_container(container.id)
+                self._schedule_cleanup(container.id, self.SUCCESS_CLEANUP_DELAY)
                 
                 return True
                 
@@ -246,22 +287,22 @@ class ScraperService:
                 logger.error(f"❌ Job {job_id} failed with exit code {exit_code}")
                 
                 # Get error logs
-                logs = self.docker.get_container_logs(container.id, stream=False, tail=50)
+                logs = await self.docker.run_blocking(
+                    self.docker.get_container_logs, container.id, stream=False, tail=50
+                )
                 error_message = logs.decode('utf-8') if isinstance(logs, bytes) else str(logs)
                 
                 # Update job status to failed
-                self.repo.update_job_status(
+                await self.repo.update_job_status(
                     job_id,
                     JobStatus.FAILED,
-                    error_message=f"Container exited with code {exit_code}. Last logs:\n{error_message[-500:]}",
-                    completed_at=datetime.utcnow()
+                    error_message=f"Container exited with code {exit_code}. Last logs:\n{error_message[-500:]}"
                 )
                 
                 logger.error(f"📋 Full error logs for job {job_id}:\n{error_message}")
                 
-                # Cleanup container
-                await asyncio.sleep(300)  # Keep container for 5 minutes for debugging
-                self.docker.cleanup_container(container.id)
+                # Cleanup container (kept longer for debugging)
+                self._schedule_cleanup(container.id, self.FAILURE_CLEANUP_DELAY)
                 
                 return False
                 
@@ -270,15 +311,14 @@ class ScraperService:
             
             # Stop and cleanup container
             if container:
-                self.docker.stop_container(container.id)
-                self.docker.cleanup_container(container.id)
+                await self.docker.run_blocking(self.docker.stop_container, container.id)
+                await self.docker.run_blocking(self.docker.cleanup_container, container.id)
             
             # Update job status to failed
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.FAILED,
-                error_message=f"Job timed out after {settings.JOB_TIMEOUT_SECONDS} seconds",
-                completed_at=datetime.utcnow()
+                error_message=f"Job timed out after {settings.JOB_TIMEOUT_SECONDS} seconds"
             )
             
             return False
@@ -290,55 +330,69 @@ class ScraperService:
             # Cleanup container if it exists
             if container:
                 try:
-                    self.docker.cleanup_container(container.id)
+                    await self.docker.run_blocking(self.docker.cleanup_container, container.id)
                 except Exception as cleanup_error:
                     logger.error(f"Failed to cleanup container: {cleanup_error}")
             
             # Update job status to failed
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.FAILED,
-                error_message=str(e),
-                completed_at=datetime.utcnow()
+                error_message=str(e)
             )
             
             return False
     
-    def _extract_records_from_logs(self, logs: str) -> Optional[int]:
+    def _schedule_cleanup(self, container_id: str, delay: float):
+        """
+        Queue a container for cleanup by the reaper task after delay seconds
+        
+        Args:
+            container_id: Container ID
+            delay: Seconds to keep the container first
+        """
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_containers())
+        self._cleanup_queue.put_nowait((time.monotonic() + delay, container_id))
+    
+    async def _reap_containers(self):
+        """
+        Clean up queued containers as their deadlines pass (runs for the service's lifetime)
+        """
+        while True:
+            deadline, container_id = await self._cleanup_queue.get()
+            
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                # Wait for the deadline, unless an entry (possibly due sooner) arrives first
+                try:
+                    entry = await asyncio.wait_for(self._cleanup_queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    self._cleanup_queue.put_nowait(entry)
+                    self._cleanup_queue.put_nowait((deadline, container_id))
+                    continue
+            
+            try:
+                await self.docker.run_blocking(self.docker.cleanup_container, container_id)
+            except Exception as e:
+                logger.error(f"Failed to cleanup container {container_id[:12]}: {e}")
+    
+    def _extract_records_from_logs(self, logs: bytes) -> Optional[int]:
         """
         Try to extract number of records processed from logs
         
         Args:
-            logs: Container logs text
+            logs: Raw log output (scanned as bytes, without decoding)
         
         Returns:
             int: Number of records processed or None
         """
-        try:
-            # Look for common patterns in logs
-            patterns = [
-                "Records processed:",
-                "records processed:",
-                "Prepared",
-                "records for database"
-            ]
-            
-            for line in logs.split('\n'):
-                for pattern in patterns:
-                    if pattern in line:
-                        # Try to extract number
-                        import re
-                        numbers = re.findall(r'\d+', line)
-                        if numbers:
-                            return int(numbers[0])
-            
-            return None
-            
-        except Exception as e:
-            logger.warning(f"Failed to extract records from logs: {e}")
-            return None
+        match = _RECORDS_RE.search(logs)
+        return int(match.group(1)) if match else None
     
-    def get_job_container_id(self, job_id: str) -> Optional[str]:
+    async def get_job_container_id(self, job_id: str) -> Optional[str]:
         """
         Get container ID for a job
         
@@ -349,7 +403,7 @@ class ScraperService:
             str: Container ID or None
         """
         try:
-            job = self.repo.get_job_by_id(job_id)
+            job = await self.repo.get_job_by_id(job_id)
             if job:
                 return job.get('container_id')
             return None
@@ -357,7 +411,7 @@ class ScraperService:
             logger.error(f"Error getting container ID for job {job_id}: {e}")
             return None
     
-    def is_job_running(self, job_id: str) -> bool:
+    async def is_job_running(self, job_id: str) -> bool:
         """
         Check if a job is currently running
         
@@ -368,18 +422,18 @@ class ScraperService:
             bool: True if job is running
         """
         try:
-            container_id = self.get_job_container_id(job_id)
+            container_id = await self.get_job_container_id(job_id)
             if not container_id:
                 return False
             
-            status = self.docker.get_container_status(container_id)
+            status = await self.docker.run_blocking(self.docker.get_container_status, container_id)
             return status == "running"
             
         except Exception as e:
             logger.error(f"Error checking if job {job_id} is running: {e}")
             return False
     
-    def cancel_job(self, job_id: str) -> bool:
+    async def cancel_job(self, job_id: str) -> bool:
         """
         Cancel a running job
         
@@ -390,7 +444,7 @@ class ScraperService:
             bool: True if cancelled successfully
         """
         try:
-            container_id = self.get_job_container_id(job_id)
+            container_id = await self.get_job_container_id(job_id)
             if not container_id:
                 logger.warning(f"No container found for job {job_id}")
                 return False
@@ -398,18 +452,17 @@ class ScraperService:
             logger.info(f"🛑 Cancelling job {job_id} (container {container_id[:12]})")
             
             # Stop container
-            self.docker.stop_container(container_id)
+            await self.docker.run_blocking(self.docker.stop_container, container_id)
             
             # Update job status
-            self.repo.update_job_status(
+            await self.repo.update_job_status(
                 job_id,
                 JobStatus.CANCELLED,
-                error_message="Job cancelled by user",
-                completed_at=datetime.utcnow()
+                error_message="Job cancelled by user"
             )
             
             # Cleanup container
-            self.docker.cleanup_container(container_id)
+            await self.docker.run_blocking(self.docker.cleanup_container, container_id)
             
             logger.info(f"✅ Job {job_id} cancelled successfully")
             return True
@@ -417,6 +470,27 @@ class ScraperService:
         except Exception as e:
             logger.error(f"Error cancelling job {job_id}: {e}")
             return False
+    
+    async def stop_job_container(self, job_id: str, container_id: str) -> bool:
+        """
+        Stop and remove the container of a job already marked cancelled
+        
+        Args:
+            job_id: Job identifier
+            container_id: The job's container ID
+        
+        Returns:
+            bool: True if the container was stopped and removed
+        """
+        try:
+            logger.info(f"🛑 Stopping container {container_id[:12]} of cancelled job {job_id}")
+            
+            await self.docker.run_blocking(self.docker.stop_container, container_id)
+            return await self.docker.run_blocking(self.docker.cleanup_container, container_id)
+            
+        except Exception as e:
+            logger.error(f"Error stopping container of job {job_id}: {e}")
+            return False
 
 
 # Global scraper service instance
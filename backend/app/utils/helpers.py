@@ -3,7 +3,7 @@ Utility helper functions
 """
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Union
 from dateutil import parser as date_parser
 
@@ -15,7 +15,7 @@ def generate_job_id() -> str:
     Returns:
         str: Unique job ID in format: job-{timestamp}-{uuid}
     """
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
     unique_id = str(uuid.uuid4())[:8]
     return f"job-{timestamp}-{unique_id}"
 